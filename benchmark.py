@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+#
+#   Copyright (C) 2013 Alethea Butler.
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+
+"""
+Benchmarks for the midi module on synthetic sequences.
+
+Each workload is a sequence generated from a fixed seed, so runs on the same
+machine are comparable. The workloads vary the number of tracks, the event
+count and density, the number of tempo changes, and the share of meta events.
+For each workload the benchmark times Sequence.parse, Sequence.update,
+Sequence.__bytes__, Time.triple and Time.cumulative conversions, and
+TimeSpecification lookups, taking the best of several runs, and measures the
+peak memory allocated while parsing and encoding. The parse record also has
+the memory retained by the parsed sequence, per event.
+
+Results are written as JSON lines, one record per workload and operation,
+with the events per second and memory in bytes where measured:
+
+    python3 benchmark.py --output bench_output.txt
+"""
+
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import midi
+
+
+WORKLOADS = (
+    dict(name='small', tracks=2, events=2000, density=4, tempo_changes=2,
+         meta_share=0.01),
+    dict(name='dense', tracks=4, events=100000, density=32, tempo_changes=10,
+         meta_share=0.01),
+    dict(name='tempo', tracks=8, events=20000, density=4, tempo_changes=1000,
+         meta_share=0.01),
+    dict(name='meta', tracks=8, events=20000, density=4, tempo_changes=10,
+         meta_share=0.3),
+    dict(name='large', tracks=16, events=500000, density=8,
+         tempo_changes=100, meta_share=0.02))
+
+
+def generate(*, seed=0, tracks=4, events=10000, density=8, tempo_changes=10,
+             meta_share=0.01, ppqn=480):
+    """
+    Generate a deterministic synthetic Sequence.
+
+    About events events are spread over tracks tracks, each on its own
+    channel, with an average of density events per quarter note in each
+    track. Most are NoteOn and NoteOff pairs, with some ControlChange and
+    PitchBend events, and meta_share of them are Text and Marker events.
+    Track 0 also gets tempo_changes SetTempo events, and a SetTimeSignature
+    for every fourth of them, at random times. The same arguments always
+    give the same sequence.
+    """
+    generator = random.Random(seed)
+    sequence = midi.Sequence(format=1, division=midi.TimeDivision(ppqn))
+    vpt = midi.Time.vpqn // ppqn
+    length = 0
+    for track in range(tracks):
+        channel = track % 16
+        tick = 0
+        count = 0
+        while count < events // tracks:
+            tick += round(generator.expovariate(density) * ppqn)
+            when = midi.Time(tick * vpt)
+            kind = generator.random()
+            if kind < meta_share:
+                cls = generator.choice((midi.Text, midi.Marker))
+                event = cls('event {0}'.format(count), time=when, track=track)
+                count += 1
+            elif kind < meta_share + 0.05:
+                event = midi.ControlChange(
+                    generator.randrange(128), generator.randrange(128),
+                    time=when, track=track, channel=channel)
+                count += 1
+            elif kind < meta_share + 0.1:
+                event = midi.PitchBend(
+                    generator.uniform(-1, 1), time=when, track=track,
+                    channel=channel)
+                count += 1
+            else:
+                note = generator.randrange(24, 108)
+                duration = round(generator.expovariate(density / 2) * ppqn)
+                event = midi.NoteOn(
+                    note, generator.randrange(1, 128), time=when,
+                    track=track, channel=channel)
+                sequence.append(midi.NoteOff(
+                    note, 0, time=midi.Time((tick + duration) * vpt),
+                    track=track, channel=channel))
+                count += 2
+            sequence.append(event)
+        length = max(length, tick)
+    for index in range(tempo_changes):
+        tick = generator.randrange(max(length, 1))
+        sequence.append(midi.SetTempo(
+            generator.randrange(300000, 1000000),
+            time=midi.Time(tick * vpt), track=0))
+        if index % 4 == 3:
+            sequence.append(midi.SetTimeSignature(
+                midi.TimeSignature(generator.randrange(2, 8),
+                                   generator.choice((4, 8))),
+                time=midi.Time(tick * vpt), track=0))
+    sequence.update()
+    return sequence
+
+
+def timed(function, repeat):
+    """Get the best wall time of repeat calls of function, in seconds."""
+    best = None
+    for index in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best:
+            best = seconds
+    return best
+
+
+def peak(function):
+    """Get the peak memory allocated during a call of function, in bytes."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def retained(function):
+    """
+    Get the memory still allocated after a call of function, in bytes.
+
+    The result of function is kept alive until it is measured, so this is
+    the memory held by the result, such as a parsed Sequence.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = function()
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+
+def run(workload, *, seed=0, repeat=5, scale=1):
+    """
+    Benchmark one workload, and return a list of result records.
+
+    The event count of the workload is multiplied by scale.
+    """
+    parameters = dict(workload)
+    name = parameters.pop('name')
+    parameters['events'] = max(int(parameters['events'] * scale), 2)
+    sequence = generate(seed=seed, **parameters)
+    data = bytes(sequence)
+    specification = sequence.specification
+    values = [event.time.value for event in sequence]
+    cumulatives = [event.time.cumulative for event in sequence]
+    triples = [event.time.triple for event in sequence]
+
+    def parse():
+        return midi.Sequence.parse(data)
+
+    def update():
+        sequence.update(full=True)
+
+    def encode():
+        bytes(sequence)
+
+    def triple():
+        for value in values:
+            midi.Time(value, specification=specification).triple
+
+    def cumulative():
+        for value in values:
+            midi.Time(value, specification=specification).cumulative
+
+    def lookup():
+        for value, ticks, bar in zip(values, cumulatives, triples):
+            specification.time(midi.Time(value))
+            specification.cumulative(ticks)
+            specification.triple(bar)
+
+    operations = (
+        ('parse', parse, True),
+        ('update', update, False),
+        ('bytes', encode, True),
+        ('time.triple', triple, False),
+        ('time.cumulative', cumulative, False),
+        ('specification.lookup', lookup, False))
+    results = list()
+    for operation, function, measure in operations:
+        seconds = timed(function, repeat)
+        record = dict(
+            workload=name, operation=operation, events=len(sequence),
+            tracks=sequence.tracks, tempo_nodes=len(specification),
+            file_bytes=len(data), seconds=seconds,
+            events_per_second=len(sequence) / seconds if seconds else None,
+            peak_bytes=peak(function) if measure else None,
+            retained_bytes_per_event=None)
+        if operation == 'parse':
+            record['retained_bytes_per_event'] = (
+                retained(function) / len(sequence))
+        record.update(('workload_' + key, value)
+                      for key, value in parameters.items())
+        results.append(record)
+    return results
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', help='file for the JSON lines results, '
+                        'standard output by default')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='runs of each operation, the best is kept')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of the synthetic sequences')
+    parser.add_argument('--scale', type=float, default=1,
+                        help='factor for the event counts of the workloads')
+    parser.add_argument('--workload', action='append',
+                        choices=[workload['name'] for workload in WORKLOADS],
+                        help='workload to run, all by default; repeatable')
+    arguments = parser.parse_args(arguments)
+
+    output = sys.stdout
+    if arguments.output is not None:
+        output = open(arguments.output, 'w')
+    environment = dict(python=platform.python_version(),
+                       implementation=platform.python_implementation(),
+                       machine=platform.machine(), system=platform.system())
+    try:
+        for workload in WORKLOADS:
+            if (arguments.workload is not None and
+                    workload['name'] not in arguments.workload):
+                continue
+            for record in run(workload, seed=arguments.seed,
+                              repeat=arguments.repeat, scale=arguments.scale):
+                record.update(environment)
+                output.write(json.dumps(record, sort_keys=True) + '\n')
+                output.flush()
+                line = ('{workload:>6} {operation:<21} {seconds:9.4f}s '
+                        '{events_per_second:12.0f} events/s'.format(**record))
+                if record['retained_bytes_per_event'] is not None:
+                    line += ' {0:8.1f} bytes/event'.format(
+                        record['retained_bytes_per_event'])
+                print(line, file=sys.stderr)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
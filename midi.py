@@ -32,12 +32,19 @@ contain references to the flag object.
 """
 
 import io
+import array
+import asyncio
 import binascii
+import bisect
 import collections
+import concurrent.futures
+import heapq
+import itertools
 import numbers
 import operator
 import copy
 import math
+import time
 
 
 class Tempo:
@@ -375,14 +382,17 @@ class Program:
 
 
 class Time:
+    __slots__ = ('_value', '_cumulative', '_specification', '_cache', 'event')
+
     def __init__(self, value=0, *, specification=None, event=None):
         self._cumulative = None
+        self._cache = None
         if isinstance(value, Time):
             self._value = value.value
-            self.specification = value.specification
+            self._specification = value.specification
         else:
             self._value = value
-            self.specification = specification
+            self._specification = specification
         self.event = event
 
     vpt = 16
@@ -391,7 +401,7 @@ class Time:
 
     @property
     def specification(self):
-        if self.event is None:
+        if self.event is None or self.event.sequence is None:
             return self._specification
         else:
             return self.event.sequence.specification
@@ -408,7 +418,10 @@ class Time:
 
     @value.setter
     def value(self, value):
+        previous = self._value
         self._value = value
+        self._cache = None
+        self._changed(previous)
 
     @property
     def note(self):
@@ -447,39 +460,50 @@ class Time:
 
     @property
     def cumulative(self):
-        node = self.node
-        if node is None:
+        cache = self._resolve()
+        if cache is None or cache[2] is None:
             return self._cumulative
-        value = self.value - node.value
-        return round(value / node.vpp + node.cumulative)
+        if cache[3] is None:
+            node = cache[2]
+            value = self.value - node.value
+            cache[3] = round(value / node.vpp + node.cumulative)
+        return cache[3]
 
     @cumulative.setter
     def cumulative(self, cumulative):
-        if self.specification is None:
-            self._cumulative = cumulative
-            return
-        node = self.specification.cumulative(cumulative)
+        # A pending cumulative value is resolved through this setter, which
+        # is not a change.
+        previous = self._value if self._cumulative is None else None
+        self._cache = None
+        node = None
+        if self.specification is not None:
+            node = self.specification.cumulative(cumulative)
         if node is None:
             self._cumulative = cumulative
-            return
-        self._cumulative = None
-        self._value = node.value
-        self._value += round((cumulative - node.cumulative) * node.vpp)
+        else:
+            self._cumulative = None
+            self._value = node.value
+            self._value += round((cumulative - node.cumulative) * node.vpp)
+        if previous is not None:
+            self._changed(previous)
 
     @property
     def triple(self):
-        node = self.node
-        if node is None:
+        cache = self._resolve()
+        if cache is None or cache[2] is None:
             return (None, None, None)
-        value = self.value - node.value
-        bar, beat, tick = node.triple
-        tpb = 1920 / node.signature.denominator
-        tick += value / self.vpt
-        beat += round(tick // tpb) - 1
-        tick = round(tick % tpb)
-        bar += beat // node.signature.numerator
-        beat = beat % node.signature.numerator + 1
-        return (bar, beat, tick)
+        if cache[4] is None:
+            node = cache[2]
+            value = self.value - node.value
+            bar, beat, tick = node.triple
+            tpb = 1920 / node.signature.denominator
+            tick += value / self.vpt
+            beat += round(tick // tpb) - 1
+            tick = round(tick % tpb)
+            bar += beat // node.signature.numerator
+            beat = beat % node.signature.numerator + 1
+            cache[4] = (bar, beat, tick)
+        return cache[4]
 
     @triple.setter
     def triple(self, value):
@@ -497,16 +521,74 @@ class Time:
             raise MIDIError(error)
         vpm = self.vpn * node.signature.numerator / node.signature.denominator
         vpb = self.vpn / node.signature.denominator
+        previous = self._value
         self._value = node.value
         self._value += round((bar - node.bar) * vpm)
         self._value += round((beat - node.beat) * vpb)
         self._value += (tick - node.tick) * self.vpt
+        self._cache = None
+        self._changed(previous)
 
     @property
-    def node(self):
+    def seconds(self):
+        """
+        Access the time in seconds from the start of the sequence.
+
+        Uses the microseconds of the tempo map node before the time, so
+        changes in tempo are accounted for. Returns None without a time
+        specification.
+        """
+        cache = self._resolve()
+        if cache is None or cache[2] is None:
+            return None
+        node = cache[2]
+        microseconds = node.microseconds + (self.value - node.value) * node.mpv
+        return microseconds / 1000000
+
+    @seconds.setter
+    def seconds(self, seconds):
         if self.specification is None:
+            raise MIDIError('Cannot set seconds without a time specification.')
+        microseconds = seconds * 1000000
+        node = self.specification.microseconds(microseconds)
+        if node is None:
+            raise MIDIError('Time out of range: {0} seconds.'.format(seconds))
+        self.value = round(node.value +
+                           (microseconds - node.microseconds) / node.mpv)
+
+    @property
+    def node(self):
+        cache = self._resolve()
+        if cache is None:
+            return None
+        return cache[2]
+
+    def _resolve(self):
+        """
+        Get the cached node, cumulative ticks, and triple of the time.
+
+        The cache is a list of the specification, its generation, the node,
+        and the cumulative and triple values, which are None until first
+        read. It is discarded when the value of the time changes, or when the
+        specification is updated and bumps its generation.
+        """
+        specification = self.specification
+        if specification is None:
             return None
-        return self.specification.time(self)
+        cache = self._cache
+        if (cache is None or cache[0] is not specification or
+                cache[1] != specification.generation):
+            node = specification.time(self)
+            cache = [specification, specification.generation, node,
+                     None, None]
+            self._cache = cache
+        return cache
+
+    def _changed(self, value):
+        """Tell the sequence of the event that the time changed from value."""
+        event = self.event
+        if event is not None and event.sequence is not None:
+            event.sequence._touch(event, value)
 
     def _comparison(self, other, comparison):
         if isinstance(other, Time):
@@ -564,13 +646,13 @@ class Time:
         return 'Time({value})'.format(value=self.value)
 
     def __str__(self):
-        self._node = self.specification.time(self)
-        string = '{0}|{1}|{2:03}'.format(*self.triple)
-        self._node = None
-        return string
+        return '{0}|{1}|{2:03}'.format(*self.triple)
 
 
 class TimeNode:
+    __slots__ = ('specification', 'value', 'signature', 'tempo', 'bar', 'beat',
+                 'tick', 'cumulative', 'microseconds')
+
     def __init__(self, value=0, *, bar=1, beat=1, tick=0, time=None,
                  triple=None, cumulative=0, signature=None, tempo=None,
                  specification=None):
@@ -584,6 +666,7 @@ class TimeNode:
         if triple is not None:
             self.triple = triple
         self.cumulative = cumulative
+        self.microseconds = 0
         if time is not None:
             self.value = time.value
             self.cumulative = time.cumulative
@@ -605,6 +688,20 @@ class TimeNode:
             return Time.vpqn / (self.specification.division.pps /
                                 self.tempo.bps)
 
+    @property
+    def mpv(self):
+        """
+        Get the microseconds per time value.
+
+        In PPQN mode, this follows the microseconds per quarter note stored in
+        SetTempo events. In PPS mode, it matches vpp, so that pulses are
+        1/pps seconds long.
+        """
+        if self.specification.division.mode == 'ppqn':
+            return self.tempo.mpqn / Time.vpqn
+        else:
+            return 1000000 / (self.tempo.bps * Time.vpqn)
+
     def __repr__(self):
         return 'TimeNode({value})'.format(value=self.value)
 
@@ -616,6 +713,8 @@ class TimeSpecification(list):
         self.sequence = sequence
         self._default_tempo = Tempo()
         self._default_signature = TimeSignature()
+        self.generation = 0
+        self._index()
 
     @property
     def division(self):
@@ -632,22 +731,21 @@ class TimeSpecification(list):
         if len(events) < 1 and self.sequence is not None:
             events = self.sequence
         del self[:]
+        self._index()
         tempo = self._default_tempo
         signature = self._default_signature
-        self.append(TimeNode(tempo=tempo, signature=signature,
-                             specification=self))
-        time = Time(specification=self)
+        self._append(TimeNode(tempo=tempo, signature=signature,
+                              specification=self))
         for event in events:
-            if event.tempo != tempo or event.signature != signature:
-                node = TimeNode(time=event.time, tempo=event.tempo,
-                                signature=event.signature, specification=self)
-                if event.time != time:
-                    self.append(node)
-                else:
-                    self[-1] = node
+            # Most events share the objects of the events before them.
+            if (event.tempo is not tempo and event.tempo != tempo or
+                    event.signature is not signature and
+                    event.signature != signature):
+                self._place(TimeNode(time=event.time, tempo=event.tempo,
+                                     signature=event.signature,
+                                     specification=self))
                 tempo = event.tempo
                 signature = event.signature
-                time = event.time
 
     def events(self, *, track=None):
         events = list()
@@ -674,26 +772,77 @@ class TimeSpecification(list):
 
     def triple(self, iterable):
         bar, beat, tick = iterable
-        for node in reversed(self):
-            if node.bar < bar:
-                return node
-            elif node.bar == bar:
-                if node.beat < beat:
-                    return node
-                elif node.beat == beat:
-                    if node.tick <= tick:
-                        return node
-        return None
+        return self._lookup((bar, beat, tick), 'triple')
+
+    def microseconds(self, value):
+        return self._lookup(value, 'microseconds')
 
     def _lookup(self, value, key):
-        for node in reversed(self):
-            if node.__dict__[key] <= value:
-                return node
-        return None
+        """
+        Find the last node whose key is less than or equal to value.
+
+        Nodes are in chronological order, so each key index is sorted and can
+        be searched with bisect. Returns None if value precedes every node.
+        """
+        keys = self._keys[key]
+        if len(keys) != len(self):
+            self._index()
+            keys = self._keys[key]
+        index = bisect.bisect_right(keys, value)
+        if index < 1:
+            return None
+        return self[index - 1]
+
+    def _place(self, node):
+        """
+        Append a node, replacing the last node if it is at the same time.
+
+        A tempo and a signature change at the same time make one node.
+        """
+        if len(self) > 0 and self[-1].value == node.value:
+            del self[-1]
+            for keys in self._keys.values():
+                del keys[-1]
+            self.generation += 1
+        self._append(node)
+
+    def _append(self, node):
+        """
+        Append a node and add its keys to the lookup indexes.
+
+        Also sets the microseconds of the node, the sum of the durations of
+        the nodes before it.
+        """
+        if len(self) > 0 and self.division is not None:
+            previous = self[-1]
+            node.microseconds = previous.microseconds
+            node.microseconds += (node.value - previous.value) * previous.mpv
+        self.generation += 1
+        self.append(node)
+        self._keys['value'].append(node.value)
+        self._keys['cumulative'].append(node.cumulative)
+        self._keys['triple'].append(node.triple)
+        self._keys['microseconds'].append(node.microseconds)
+
+    def _index(self):
+        """Rebuild the lookup indexes from the nodes."""
+        self.generation += 1
+        self._keys = {
+            'value': [node.value for node in self],
+            'cumulative': [node.cumulative for node in self],
+            'triple': [node.triple for node in self],
+            'microseconds': [node.microseconds for node in self]}
 
 
 class Event:
-    """Base class for MIDI events."""
+    """
+    Base class for MIDI events.
+
+    Event classes define __slots__, since a sequence can hold millions of
+    them. Subclasses should list any attributes they add in __slots__.
+    """
+
+    __slots__ = ('_time', '_track', 'sequence', 'tempo', 'signature')
 
     def __init__(self, *, time=None, track=None, sequence=None,
                  tempo=None, signature=None):
@@ -705,9 +854,11 @@ class Event:
         in addition to the time and track keywords.
         """
         if time is None:
-            time = Time()
-        self.time = time
-        self.track = track
+            time = Time(event=self)
+        else:
+            time.event = self
+        self._time = time
+        self._track = track
         self.sequence = sequence
         self.tempo = tempo
         self.signature = signature
@@ -718,11 +869,25 @@ class Event:
 
     @time.setter
     def time(self, value):
+        previous = self._time.value
         self._time = value
         self._time.event = self
+        if self.sequence is not None:
+            self.sequence._touch(self, previous)
+
+    @property
+    def track(self):
+        return self._track
+
+    @track.setter
+    def track(self, track):
+        previous = self._track
+        self._track = track
+        if self.sequence is not None:
+            self.sequence._move(self, previous)
 
     @staticmethod
-    def parse(source):
+    def parse(source, status=None):
         """
         Create a new Event object of the appropriate type from a bytes.
 
@@ -731,11 +896,29 @@ class Event:
         event.
 
         A common method of calling parse is to create an iterator from a Chunk
-        and call parse repeatedly.
+        and call parse repeatedly. Bytes-like sources are decoded in place.
+
+        The optional status keyword is the running status: the status byte of
+        the previous channel event. It is used if the source starts with a
+        data byte instead of a status byte.
         """
         if not isinstance(source, collections.Iterator):
-            source = iter(source)
-        status = next(source)
+            try:
+                buffer = memoryview(source)
+            except TypeError:
+                source = iter(source)
+            else:
+                try:
+                    return Event._unpack(buffer, 0, status)[0]
+                except IndexError:
+                    raise MIDIError('Incomplete event.')
+        byte = next(source)
+        if byte < 0x80:
+            if status is None:
+                raise MIDIError('Running status without a previous status.')
+            return ChannelEvent._parse(itertools.chain((byte,), source),
+                                       status)
+        status = byte
         if status == MetaEvent.status:
             event = MetaEvent._parse(source)
         elif status == 0xf7 or status == 0xf0:
@@ -744,10 +927,57 @@ class Event:
             event = ChannelEvent._parse(source, status)
         return event
 
+    @staticmethod
+    def _unpack(buffer, offset, running=None):
+        """
+        Decode the event starting at offset in a buffer.
+
+        If the event starts with a data byte, the running status is used as
+        its status byte. Returns the event and the offset of the byte
+        following it. Raises an IndexError if the event runs past the end of
+        the buffer.
+        """
+        status = buffer[offset]
+        if status < 0x80:
+            if running is None:
+                raise MIDIError('Running status without a previous status.')
+            return ChannelEvent._unpack(buffer, offset, running)
+        elif status == MetaEvent.status:
+            return MetaEvent._unpack(buffer, offset + 1)
+        elif status == 0xf7 or status == 0xf0:
+            return SysExEvent._unpack(buffer, offset + 1, status)
+        else:
+            return ChannelEvent._unpack(buffer, offset + 1, status)
+
     def __str__(self):
         return _name_to_desc(type(self).__name__)
 
 
+def _setting(slot, doc):
+    """
+    Make a property over an inherited slot that an event class sets itself.
+
+    The tempo, signature and program slots are flags that update sets on
+    most events, but SetTempo, SetTimeSignature and ProgramChange events set
+    them. Reassigning one of those tells the sequence of the event, as
+    changing its time does. Setting it for the first time, in the
+    constructor or while the event is copied or unpickled, does not.
+    """
+    def getter(self):
+        return slot.__get__(self, type(self))
+
+    def setter(self, value):
+        try:
+            slot.__get__(self, type(self))
+        except AttributeError:
+            slot.__set__(self, value)
+            return
+        slot.__set__(self, value)
+        if self.sequence is not None:
+            self.sequence._touch(self)
+    return property(getter, setter, doc=doc)
+
+
 class ChannelEvent(Event):
     """
     Base class for channel events.
@@ -757,6 +987,8 @@ class ChannelEvent(Event):
     their status byte that dictates what channel the event acts on.
     """
 
+    __slots__ = ('_channel', 'program')
+
     def __init__(self, **keywords):
         """
         Create a new ChannelEvent object.
@@ -764,7 +996,7 @@ class ChannelEvent(Event):
         In addition to the keywords inherited from Event, ChannelEvents also
         accept the channel and program keywords.
         """
-        self.channel = keywords.pop('channel', None)
+        self._channel = keywords.pop('channel', None)
         self.program = keywords.pop('program', None)
         super().__init__(**keywords)
 
@@ -779,11 +1011,36 @@ class ChannelEvent(Event):
                     'Encountered an unknown event: {status:X}.'.format(
                     status=status))
             event = ChannelEvent._events[type]._parse(source)
-            event.channel = channel
+            event._channel = channel
             return event
         else:
             return cls(next(source), next(source))
 
+    @classmethod
+    def _unpack(cls, buffer, offset, status=None):
+        """Delegate unpack method. Called by Event._unpack."""
+        if cls == ChannelEvent:
+            type = status & 0xf0
+            if type not in ChannelEvent._events:
+                raise MIDIError(
+                    'Encountered an unknown event: {status:X}.'.format(
+                    status=status))
+            event, offset = ChannelEvent._events[type]._unpack(buffer, offset)
+            event._channel = status & 0x0f
+            return event, offset
+        else:
+            return cls(buffer[offset], buffer[offset + 1]), offset + 2
+
+    @property
+    def channel(self):
+        return self._channel
+
+    @channel.setter
+    def channel(self, channel):
+        self._channel = channel
+        if self.sequence is not None:
+            self.sequence._touch(self)
+
     @property
     def type(self):
         """Get the type number 0x80-0x30. Immutable."""
@@ -818,6 +1075,8 @@ class NoteOff(ChannelEvent):
     Available attributes are note and velocity.
     """
 
+    __slots__ = ('note', 'velocity')
+
     def __init__(self, note=None, velocity=None, **keywords):
         """
         Create a NoteOff object. Accepts note and velocity arguments.
@@ -837,6 +1096,8 @@ class NoteOn(ChannelEvent):
     Available attributes are note and velocity.
     """
 
+    __slots__ = ('note', 'velocity')
+
     def __init__(self, note=None, velocity=None, **keywords):
         """
         Create a NoteOn object. Accepts note and velocity arguments.
@@ -856,6 +1117,8 @@ class NoteAftertouch(ChannelEvent):
     Available attributes are note and amount.
     """
 
+    __slots__ = ('note', 'amount')
+
     def __init__(self, note=None, amount=None, **keywords):
         """
         Create a NoteAftertouch object. Accepts note and amount arguments.
@@ -875,6 +1138,8 @@ class ControlChange(ChannelEvent):
     Available attributes are controller and value.
     """
 
+    __slots__ = ('controller', 'value')
+
     def __init__(self, controller=None, value=None, **keywords):
         """
         Create a ControlChange object. Accepts controller and value arguments.
@@ -895,6 +1160,11 @@ class ProgramChange(ChannelEvent):
     attribute.
     """
 
+    __slots__ = ()
+
+    program = _setting(ChannelEvent.program,
+                       'Access the Program set by the event.')
+
     def __init__(self, program=None, **keywords):
         """
         Create a ProgramChange object.
@@ -914,6 +1184,11 @@ class ProgramChange(ChannelEvent):
         """Delegate parser method. Called by ChannelEvent._parse."""
         return cls(next(source))
 
+    @classmethod
+    def _unpack(cls, buffer, offset):
+        """Delegate unpack method. Called by ChannelEvent._unpack."""
+        return cls(buffer[offset]), offset + 1
+
     def _parameters(self):
         return (self.program.number - 1,)
 
@@ -929,6 +1204,8 @@ class ChannelAftertouch(ChannelEvent):
     The pressure is accessible by the amount attribute.
     """
 
+    __slots__ = ('amount',)
+
     def __init__(self, amount=None, **keywords):
         """Create a ChannelAftertouch object. Accepts an amount argument."""
         super().__init__(**keywords)
@@ -939,6 +1216,11 @@ class ChannelAftertouch(ChannelEvent):
         """Delegate parser method. Called by ChannelEvent._parse."""
         return cls(next(source))
 
+    @classmethod
+    def _unpack(cls, buffer, offset):
+        """Delegate unpack method. Called by ChannelEvent._unpack."""
+        return cls(buffer[offset]), offset + 1
+
     def _parameters(self):
         return (self.amount,)
 
@@ -950,6 +1232,8 @@ class PitchBend(ChannelEvent):
     The value parameter is a floating point number between -1 and 1.
     """
 
+    __slots__ = ('value',)
+
     def __init__(self, value=None, **keywords):
         """Create a PitchBend object. Accepts a value argument."""
         super().__init__(**keywords)
@@ -962,8 +1246,15 @@ class PitchBend(ChannelEvent):
         value = (value / 0x2000) - 1
         return cls(value)
 
+    @classmethod
+    def _unpack(cls, buffer, offset):
+        """Delegate unpack method. Called by ChannelEvent._unpack."""
+        value = (buffer[offset] & 0x7f) | ((buffer[offset + 1] & 0x7f) << 7)
+        value = (value / 0x2000) - 1
+        return cls(value), offset + 2
+
     def _parameters(self):
-        value = round((self.vale + 1) * 0x2000)
+        value = round((self.value + 1) * 0x2000)
         return (value & 0x7f, (value >> 7) & 0x7f)
 
     def __repr__(self):
@@ -981,6 +1272,8 @@ class MetaEvent(Event):
     files.
     """
 
+    __slots__ = ()
+
     @classmethod
     def _parse(cls, source):
         """Delegate parser method. Called by Event.parse."""
@@ -997,6 +1290,28 @@ class MetaEvent(Event):
                 data.append(next(source))
             return cls(data)
 
+    @classmethod
+    def _unpack(cls, buffer, offset):
+        """
+        Delegate unpack method. Called by Event._unpack.
+
+        The payload is passed to the event class as a memoryview slice of the
+        buffer, so it is not copied before the event decodes it.
+        """
+        if cls == MetaEvent:
+            type = buffer[offset]
+            try:
+                event_class = cls._events[type]
+            except KeyError:
+                raise MIDIError('Unknown Meta Event type: {0:X}.'.format(type))
+            return event_class._unpack(buffer, offset + 1)
+        else:
+            length, offset = _var_int_unpack(buffer, offset)
+            data = buffer[offset:offset + length]
+            if len(data) < length:
+                raise IndexError('Meta event data is truncated.')
+            return cls(data), offset + length
+
     status = 0xff
 
     @property
@@ -1027,6 +1342,8 @@ class TextMetaEvent(MetaEvent):
     exceed the ASCII range, but can include ISO 8859-1 characters.
     """
 
+    __slots__ = ('text',)
+
     def __init__(self, text=None, **keywords):
         """Create a TextMetaEvent from a string argument, if present."""
         super().__init__(**keywords)
@@ -1049,6 +1366,8 @@ class SequenceNumber(MetaEvent):
     The pattern number of a format 2 track or a format 0 or 1 sequence.
     """
 
+    __slots__ = ('number',)
+
     def __init__(self, number=None, **keywords):
         """Create a SequenceNumber from a numeric argument or bytes."""
         super().__init__(**keywords)
@@ -1069,30 +1388,44 @@ class SequenceNumber(MetaEvent):
 class Text(TextMetaEvent):
     """Arbitrary text for comments or description."""
 
+    __slots__ = ()
+
 
 class Copyright(TextMetaEvent):
     """Stores a copyright notice. Can include '©' (0xa9)."""
 
+    __slots__ = ()
+
 
 class Name(TextMetaEvent):
     """Defines sequence name or a track name."""
 
+    __slots__ = ()
+
 
 class ProgramName(TextMetaEvent):
     """A descriptive string of the instrument being used."""
 
+    __slots__ = ()
+
 
 class Lyrics(TextMetaEvent):
     """Defines lyrics for sheet music or a karaoke system."""
 
+    __slots__ = ()
+
 
 class Marker(TextMetaEvent):
     """Marks a significant point in the sequence."""
 
+    __slots__ = ()
+
 
 class CuePoint(TextMetaEvent):
     """Marks the start of a new sound or action."""
 
+    __slots__ = ()
+
 
 class ChannelPrefix(MetaEvent):
     """
@@ -1102,6 +1435,8 @@ class ChannelPrefix(MetaEvent):
     the channel attribute.
     """
 
+    __slots__ = ('channel',)
+
     def __init__(self, channel=None, **keywords):
         """
         Create a ChannelPrefix from an optional number or bytes argument.
@@ -1129,6 +1464,8 @@ class EndTrack(MetaEvent):
     never need to interact with them.
     """
 
+    __slots__ = ()
+
     def __init__(self, source=None, **keywords):
         """Create an EndTrack object."""
         super().__init__(**keywords)
@@ -1148,6 +1485,10 @@ class SetTempo(MetaEvent):
     The associated Tempo object is accessible from the tempo attribute.
     """
 
+    __slots__ = ()
+
+    tempo = _setting(Event.tempo, 'Access the Tempo set by the event.')
+
     def __init__(self, tempo=None, **keywords):
         """
         Create a SetTempo object.
@@ -1182,9 +1523,13 @@ class SMPTEOffset(MetaEvent):
     SMPTEOffsets can be used in a pass-through fashion.
     """
 
+    __slots__ = ('data',)
+
     def __init__(self, data=None, **keywords):
         """Create a SMPTEOffset. Accepts a bytes argument."""
         super().__init__(**keywords)
+        if isinstance(data, memoryview):
+            data = bytearray(data)
         self.data = data
 
     def _bytes(self):
@@ -1200,6 +1545,11 @@ class SetTimeSignature(MetaEvent):
     attribute.
     """
 
+    __slots__ = ()
+
+    signature = _setting(Event.signature,
+                         'Access the TimeSignature set by the event.')
+
     def __init__(self, signature=None, **keywords):
         """
         Create a SetTempo object.
@@ -1229,6 +1579,8 @@ class SetKeySignature(MetaEvent):
     The key and scale can be accessed by the key and scale attributes.
     """
 
+    __slots__ = ('key', 'scale')
+
     def __init__(self, key=None, scale=None, **keywords):
         """
         Create a SetKeySignature from bytes or number key and scale arguments.
@@ -1260,9 +1612,13 @@ class ProprietaryEvent(MetaEvent):
     The binary payload is accessible through the data attribute.
     """
 
+    __slots__ = ('data',)
+
     def __init__(self, data=None, **keywords):
         """Create a ProprietaryEvent from an optional bytes argument."""
         super().__init__(**keywords)
+        if isinstance(data, memoryview):
+            data = bytearray(data)
         self.data = data
 
     def _bytes(self):
@@ -1274,14 +1630,129 @@ class SysExEvent(Event):
     """
     A system exclusive event is a manufacturer-specific event.
 
-    Currently unsupported. Attempting to parse SysExEvent will raise a
-    MIDIError.
+    The status attribute is 0xf0 for a system exclusive message, or 0xf7 for
+    a continuation packet or an escape sequence. The data attribute holds the
+    bytes after the status and length. A complete message ends with 0xf7. A
+    message sent in packets at different times starts with a 0xf0 event that
+    does not end with 0xf7, followed by 0xf7 events, the last of which does.
+    Each packet is a separate event, and packets at the same time keep their
+    order when the sequence is sorted.
+
+    Events decoded from a bytes-like source keep their data as a memoryview
+    slice of it, so large dumps are not copied. The slices keep the source
+    alive, and an mmap source cannot be closed while they exist. Pickled and
+    copied events hold bytes instead.
     """
 
+    __slots__ = ('status', 'data')
+
+    def __init__(self, data=None, *, status=0xf0, **keywords):
+        """
+        Create a SysExEvent.
+
+        Accepts a bytes argument, and a status keyword of 0xf0 (the default)
+        or 0xf7.
+        """
+        super().__init__(**keywords)
+        if status != 0xf0 and status != 0xf7:
+            raise MIDIError(
+                'Not a system exclusive status: {0:X}.'.format(status))
+        self.status = status
+        self.data = data
+
     @classmethod
-    def _parse(cls, source):
+    def _parse(cls, source, status):
         """Delegate parser method. Called by Event.parse."""
-        raise MIDIError('System exclusive events are unsupported.')
+        length = _var_int_parse(source)
+        data = bytearray()
+        for i in range(length):
+            data.append(next(source))
+        return cls(data, status=status)
+
+    @classmethod
+    def _unpack(cls, buffer, offset, status):
+        """
+        Delegate unpack method. Called by Event._unpack.
+
+        The data is a memoryview slice of the buffer, which is not copied.
+        """
+        length, offset = _var_int_unpack(buffer, offset)
+        data = buffer[offset:offset + length]
+        if len(data) < length:
+            raise IndexError('System exclusive data is truncated.')
+        return cls(data, status=status), offset + length
+
+    def __getstate__(self):
+        # Memoryview data cannot be pickled or copied, so it becomes bytes.
+        slots = dict()
+        for cls in type(self).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if hasattr(self, name):
+                    slots[name] = getattr(self, name)
+        if isinstance(self.data, memoryview):
+            slots['data'] = bytes(self.data)
+        return None, slots
+
+    def __repr__(self):
+        if self.status == 0xf0:
+            return '{name}({data!r})'.format(
+                name=type(self).__name__, data=bytes(self.data))
+        return '{name}({data!r}, status=0x{status:x})'.format(
+            name=type(self).__name__, data=bytes(self.data),
+            status=self.status)
+
+    def __bytes__(self):
+        """Bytes, including delta time, for writing to a MIDI file."""
+        array = bytearray()
+        array.append(self.status)
+        array.extend(_var_int_bytes(len(self.data)))
+        array.extend(self.data)
+        return bytes(array)
+
+
+class ParseStats:
+    """
+    Measurements of a Sequence.parse call, passed as its stats keyword.
+
+    The phases attribute is a dict of the wall time in seconds of each phase
+    of parsing, in the order they ran: 'chunks' for reading the header and
+    locating the track chunks, 'decode' for decoding their events, 'sort' for
+    finding their time values and merging the tracks into chronological
+    order, and 'update' for updating the sequence. The events attribute is a
+    Counter of the decoded events by class name, before update adds or
+    removes any. The tracks attribute is a list of the sizes of the track
+    chunks in bytes, and tempo_map is the number of nodes in the tempo map
+    afterwards.
+
+    Measuring is cheap, and without a stats object parse does nothing extra.
+    A lazy parse only has the chunks phase and track sizes.
+    """
+
+    def __init__(self):
+        self.phases = dict()
+        self.events = collections.Counter()
+        self.tracks = list()
+        self.tempo_map = 0
+        self._mark = None
+
+    @property
+    def total(self):
+        """Get the total time of the phases in seconds."""
+        return sum(self.phases.values())
+
+    def _start(self):
+        """Start timing the next phase."""
+        self._mark = time.perf_counter()
+
+    def _phase(self, name):
+        """Add the time since the last mark to a phase, and start the next."""
+        now = time.perf_counter()
+        self.phases[name] = self.phases.get(name, 0) + now - self._mark
+        self._mark = now
+
+    def __repr__(self):
+        return 'ParseStats({n} events, {seconds:.6f} seconds)'.format(
+            n=sum(self.events.values()), seconds=self.total)
 
 
 class Sequence(list):
@@ -1294,63 +1765,131 @@ class Sequence(list):
     objects.
     """
 
-    def __init__(self, events=list(), *, format=None, division=None):
+    # EndTrack times by track as of the last update, or None if the next
+    # update must be a full one, the track index, or None until it is
+    # needed, and the sort keys of a sorted sequence. Also the defaults while
+    # unpickling, which appends events before restoring attributes.
+    _ends = None
+    _tracks = None
+    _keys = None
+
+    def __init__(self, events=list(), *, format=None, division=None,
+                 running_status=False, keep_sorted=False):
         """
         Create a Sequence.
 
         Accepts a list of events or another sequence as an optional argument.
         The format and time division of a sequence can be specified with the
         optional format and division keywords.
+
+        If the running_status keyword is true, the sequence is written with
+        MIDI running status: a channel event with the same status byte as the
+        previous event in its track omits it. This is off by default.
+
+        If the keep_sorted keyword is true, the sequence keeps itself sorted.
+        See keep_sorted.
         """
         super().__init__(events)
+        self._ends = None
+        self._low = None
+        self._dirty = set()
+        self._tracks = None
+        self._keys = None
         self.specification = TimeSpecification(sequence=self)
         self._format = None
         self.format = format
         self.division = division
+        self.running_status = running_status
+        self.keep_sorted = keep_sorted
 
     @staticmethod
-    def parse(source):
+    def parse(source, *, lazy=False, stats=None):
         """
         Create a new Sequence object from a file or bytes.
 
+        Bytes-like sources, including memoryview and mmap objects, are decoded
+        in place by offset, without copying the track data. Files are read
+        into memory first.
+
+        If the lazy keyword is true, only the chunk headers are read, and a
+        LazySequence is returned that decodes each track on first access.
+
+        If the stats keyword is a ParseStats object, the time spent in each
+        phase of parsing and counts of the decoded events are recorded in it.
+
         Corrupt, truncated, or malformed sources will raise a MIDIError.
         """
-        if not isinstance(source, collections.Iterator):
-            source = iter(source)
-
-        sequence = Sequence()
-        chunk = Chunk.parse(source, id='MThd')
-        sequence.format = int.from_bytes(chunk[0:2], 'big')
-        tracks = int.from_bytes(chunk[2:4], 'big')
-        sequence.division = TimeDivision(chunk[4:6])
-        track = 0
+        if stats is not None:
+            stats._start()
+        buffer = _buffer(source)
+
+        id, start, offset = Chunk._unpack(buffer, 0, id='MThd')
+        header = buffer[start:offset]
+        format = int.from_bytes(header[0:2], 'big')
+        tracks = int.from_bytes(header[2:4], 'big')
+        division = TimeDivision(header[4:6])
+        chunks = list()
         for index in range(tracks):
-            chunk = Chunk.parse(source)
-            if chunk.id == 'MTrk':
-                data = iter(chunk)
-                cumulative = 0
-                while True:
-                    delta = _var_int_parse(data)
-                    try:
-                        event = Event.parse(data)
-                    except StopIteration:
-                        raise MIDIError(
-                            'Incomplete track. End Track event not found.')
-                    event.sequence = sequence
-                    cumulative += delta
-                    event.time.specification = sequence.specification
-                    event.time.cumulative = cumulative
-                    event.track = track
-                    sequence.append(event)
-                    if isinstance(event, EndTrack):
-                        break
-                track += 1
-
-        sequence.sort(key=sequence._meta_sort_key)
-        sequence.sort(key=sequence._cumulative_sort_key)
+            id, start, offset = Chunk._unpack(buffer, offset)
+            if id == 'MTrk':
+                chunks.append(buffer[start:offset])
+        if stats is not None:
+            stats.tracks.extend(len(chunk) for chunk in chunks)
+            stats._phase('chunks')
+
+        if lazy:
+            return LazySequence(chunks, format=format, division=division)
+        sequence = Sequence(format=format, division=division)
+        sequence._unpack_tracks(enumerate(chunks), stats)
         sequence.update()
+        if stats is not None:
+            stats._phase('update')
+            stats.tempo_map = len(sequence.specification)
         return sequence
 
+    def _unpack_tracks(self, tracks, stats=None):
+        """
+        Decode MTrk chunk data and add its events to the sequence.
+
+        Accepts (track, data) pairs. The time values of the new events are
+        found from their ticks, with the tempo map of the sequence and the
+        tempo changes among them, so none are left pending. The new events
+        are sorted by sort key and added after any existing events. The
+        sequence needs to be updated afterwards. If a ParseStats object is
+        given, the decode and sort phases are recorded in it.
+        """
+        events = list()
+        ticks = list()
+        changes = [(node.cumulative, 0, node.tempo, node.signature)
+                   for node in self.specification]
+        for track, data in tracks:
+            for cumulative, event in _unpack_track(data):
+                event._track = track
+                event.sequence = self
+                events.append(event)
+                ticks.append(cumulative)
+                if isinstance(event, SetTempo):
+                    changes.append((cumulative, 1, event.tempo, None))
+                elif isinstance(event, SetTimeSignature):
+                    changes.append((cumulative, 2, None, event.signature))
+        if stats is not None:
+            stats._phase('decode')
+            stats.events.update(type(event).__name__ for event in events)
+            stats._start()
+        changes.sort(key=operator.itemgetter(0, 1))
+        values = _tick_values(ticks, changes, self.division)
+        keys = list()
+        for event, value in zip(events, values):
+            event._time._value = value
+            keys.append((value * 65536 + event._track) * 8 +
+                        self._meta_sort_key(event))
+        order = sorted(range(len(events)), key=keys.__getitem__)
+        list.extend(self, [events[index] for index in order])
+        self._ends = None
+        self._tracks = None
+        if stats is not None:
+            stats._phase('sort')
+
     @property
     def format(self):
         """
@@ -1386,116 +1925,777 @@ class Sequence(list):
     def format(self):
         del self._format
 
+    @property
+    def division(self):
+        """
+        Access the time division of the sequence.
+
+        Setting the division changes the length of a tick, and so the tempo
+        map, so the next update is a full one. Events keep their time values.
+        """
+        return self._division
+
+    @division.setter
+    def division(self, value):
+        self._division = value
+        self._ends = None
+        self.specification.generation += 1
+
+    @property
+    def keep_sorted(self):
+        """
+        Access whether the sequence keeps itself sorted.
+
+        A sorted sequence keeps an integer sort key for each event, combining
+        its time value, track and meta sort key. Appended and inserted events
+        are placed by bisecting the keys, and events whose time or track
+        changes are moved, so the sequence never needs sorting. Insertion
+        indexes are ignored, and reordering the sequence any other way raises
+        a MIDIError.
+
+        Update orders a sequence by the same keys either way, so the same
+        edits derive the same tempo, signature and program attributes.
+        Events with equal keys, at the same time in the same track, can
+        still come out in a different order. A sorted sequence puts each
+        added or moved event after the events with its key, while update
+        keeps them in list order, where moved events stay in place and
+        insertion indexes are used.
+
+        Setting it to true sorts the sequence.
+        """
+        return self._keys is not None
+
+    @keep_sorted.setter
+    def keep_sorted(self, value):
+        if not value:
+            self._keys = None
+        elif self._keys is None:
+            self.sort()
+            self._keys = [self._sort_key(event) for event in self]
+
     @property
     def tracks(self):
         """
         Get the number of tracks in the sequence.
 
-        Note: May be slow, since finding the number of tracks requires
-        iterating through the entire sequence.
+        Uses the track index, so only the first call after reordering the
+        sequence iterates through it.
         """
-        def track(event):
-            return event.track
-        return track(max(self, key=track)) + 1
+        tracks = self._track_index()
+        if len(tracks) < 1:
+            return 0
+        return max(tracks) + 1
 
     def track(self, track):
         """
         Get a list of all the events associated with a track number.
 
         If the track number is not present in the sequence, returns an empty
-        list.
+        list. Uses the track index, so the time taken depends on the number
+        of events in the track.
         """
-        events = list()
-        for event in self:
-            if event.track == track:
+        return list(self._track_index().get(track, ()))
+
+    def _track_index(self):
+        """
+        Get the lists of events by track number, building them if needed.
+
+        The lists are in sequence order. Appending and removing events keep
+        them up to date. Moving an event to another track keeps them up to
+        date in a sorted sequence, and discards them otherwise, as sorting or
+        other reordering does.
+        """
+        if self._tracks is None:
+            tracks = dict()
+            for event in self:
+                events = tracks.get(event.track, None)
+                if events is None:
+                    events = tracks[event.track] = list()
                 events.append(event)
-        return events
+            self._tracks = tracks
+        return self._tracks
+
+    def _index_add(self, event):
+        """Add an event to the track index, in sequence order."""
+        tracks = self._tracks
+        if tracks is not None:
+            events = tracks.get(event.track, None)
+            if events is None:
+                tracks[event.track] = [event]
+            elif self._keys is None:
+                # Appended events are last in the sequence.
+                events.append(event)
+            else:
+                key = self._sort_key(event)
+                if len(events) > 0 and self._sort_key(events[-1]) <= key:
+                    events.append(event)
+                else:
+                    events.insert(
+                        _bisect(events, key, True, self._sort_key), event)
+
+    def _index_remove(self, event):
+        """Remove an event from the track index."""
+        if self._tracks is not None:
+            events = self._tracks[event.track]
+            events.remove(event)
+            if len(events) < 1:
+                del self._tracks[event.track]
+
+    def _move(self, event, track):
+        """Move an event in the track index after its track changed."""
+        tracks = self._tracks
+        if tracks is not None and self._keys is None:
+            # Where the event goes among those of its new track is not known
+            # without a scan of the sequence.
+            self._tracks = None
+        elif tracks is not None and track in tracks:
+            events = tracks[track]
+            try:
+                events.remove(event)
+            except ValueError:
+                # The event is no longer in the sequence.
+                pass
+            else:
+                if len(events) < 1:
+                    del tracks[track]
+                self._index_add(event)
+        self._touch(event, track=track)
+
+    def to_table(self):
+        """
+        Create an EventTable of the events in the sequence.
+
+        Rows follow the current order of the sequence, which is not sorted or
+        updated first.
+        """
+        table = EventTable(format=self.format, division=self.division)
+        for event in self:
+            table.append(event)
+        return table
+
+    @staticmethod
+    def from_table(table):
+        """
+        Create a new Sequence object from an EventTable.
+
+        Events are created from the rows of the table at their time values,
+        then the sequence is updated.
+        """
+        sequence = Sequence(format=table.format, division=table.division)
+        for index in range(len(table)):
+            sequence.append(table.event(index))
+        sequence.update()
+        return sequence
 
     def offset(self, time):
+        # Moving every event keeps the order, so the sort keys of a sorted
+        # sequence are computed once afterwards.
+        keys = self._keys
+        self._keys = None
         for event in self:
             event.time += time
+        if keys is not None:
+            self._keys = [self._sort_key(event) for event in self]
         self.update()
 
-    def update(self):
-        to_delete = list()
-        programs = dict()
-        tempo = Tempo()
-        signature = TimeSignature()
-        for index in range(len(self)):
-            event = self[index]
-            if isinstance(event, SetTempo):
-                to_delete.append(index)
-                tempo = event.tempo
-            else:
-                event.tempo = tempo
-            if isinstance(event, SetTimeSignature):
-                to_delete.append(index)
-                signature = event.signature
-            else:
-                event.signature = signature
-
+    def slice(self, start, end):
+        """
+        Create a new Sequence of the events from start until before end.
+
+        Start and end can be Time objects or bar|beat|tick triples. The
+        sequence is updated, and the range is found by bisecting its event
+        times. Events are copied, moved so that the slice starts at zero.
+        The tempo, time signature and programs in effect at start are
+        carried forward to the start of the slice, and events keep their
+        tracks.
+
+        Notes are paired within the slice, first on first off, as in
+        NoteIndex. Notes still sounding at end get a NoteOff event at the end
+        of the slice, and releases of notes that did not start in the slice
+        are left out, so the slice has no hanging notes.
+
+        The copies are shallow, so they share their Tempo, TimeSignature and
+        Program objects with the events of the sequence.
+        """
+        self.update()
+        start = max(self._time_value(start), 0)
+        end = self._time_value(end)
+        node = self.specification.time(Time(start))
+        events = [SetTempo(tempo=node.tempo, track=0),
+                  SetTimeSignature(signature=node.signature, track=0)]
+        programs = set()
+        # The number of notes sounding, by track, channel and note number.
+        notes = dict()
+        for event in self[_bisect(self, start):_bisect(self, end)]:
             if isinstance(event, EndTrack):
-                to_delete.append(index)
-            elif isinstance(event, ProgramChange):
-                to_delete.append(index)
-                programs[(event.track, event.channel)] = event.program
-            elif isinstance(event, ChannelEvent):
-                try:
-                    event.program = programs[(event.track, event.channel)]
-                except KeyError:
-                    event.program = Program()
-                    programs[(event.track, event.channel)] = event.program
-        self.specification.update()
-        for index in reversed(to_delete):
-            del self[index]
-
-        to_add = list()
-        programs = dict()
-        for event in self:
+                continue
+            if isinstance(event, (NoteOn, NoteOff)):
+                note = (event.track, event.channel, event.note)
+                if not _release(event):
+                    notes[note] = notes.get(note, 0) + 1
+                elif notes.get(note, 0) > 0:
+                    notes[note] -= 1
+                else:
+                    continue
             if isinstance(event, ChannelEvent):
-                program = programs.get((event.track, event.channel), None)
-                if event.program != program:
-                    programs[(event.track, event.channel)] = event.program
-                    to_add.append(ProgramChange(
-                        time=Time(event.time.value), program=event.program,
-                        track=event.track, channel=event.channel))
-        self.extend(to_add)
-        self.extend(self.specification.events(track=0))
-        self.sort(key=self._time_sort_key)
-        to_add = list()
-        for track in range(self.tracks):
-            events = self.track(track)
-            if len(events) < 1:
-                to_add.append(EndTrack(time=Time(), track=track))
-            else:
-                to_add.append(EndTrack(
-                    time=Time(events[-1].time.value), track=track))
-        self.extend(to_add)
-        self.sort()
+                key = (event.track, event.channel)
+                if key not in programs:
+                    programs.add(key)
+                    events.append(ProgramChange(
+                        program=event.program, track=event.track,
+                        channel=event.channel))
+            events.append(_copy(event, event.time.value - start))
+        for (track, channel, note), count in notes.items():
+            for index in range(count):
+                events.append(NoteOff(note, 0, time=Time(end - start),
+                                      track=track, channel=channel))
+        sequence = Sequence(format=self.format, division=self.division,
+                            running_status=self.running_status,
+                            keep_sorted=self.keep_sorted)
+        sequence.extend(events)
+        sequence.update()
+        return sequence
+
+    def quantize(self, grid, *, strength=1, swing=0, tracks=None,
+                 channels=None):
+        """
+        Move channel events towards a grid of bar|beat|tick times.
+
+        The grid is the spacing of its points in ticks, as in triples, where
+        a quarter note is 480 ticks. The grid starts again at every bar line,
+        following the time signatures of the tempo map, and the next bar line
+        is always a grid point. Each event moves strength of the way, from 0
+        to 1, to its nearest grid point. Swing delays every second grid point
+        of a bar by that fraction of the grid.
+
+        Channel events on the given tracks and channels are moved, all by
+        default, except ProgramChange events, which are derived by update.
+        Note releases move with the notes they end, as paired by NoteIndex,
+        so notes keep their durations. Releases of no note are quantized like
+        other events.
+
+        The grid times are found in one pass over the updated sequence
+        alongside the tempo map, then the sequence is updated once.
+        """
+        if grid <= 0:
+            raise MIDIError('Grid out of range: {0}.'.format(grid))
+        self.update()
+        notes = NoteIndex(self)
+        offs = dict((id(on), off) for on, off in zip(notes.on, notes.off)
+                    if off is not None)
+        released = set(id(off) for off in offs.values())
+        spacing = grid * Time.vpt
+        nodes = self.specification
+        index = 0
+        start, length = self._bar(nodes[0])
+        moves = list()
+        for event in self:
+            if (not isinstance(event, ChannelEvent) or
+                    isinstance(event, ProgramChange) or
+                    id(event) in released or
+                    tracks is not None and event.track not in tracks or
+                    channels is not None and event.channel not in channels):
+                continue
+            value = event.time.value
+            while index + 1 < len(nodes) and nodes[index + 1].value <= value:
+                index += 1
+                start, length = self._bar(nodes[index])
+            bar = value - (value - start) % length
+            step = round((value - bar) / spacing)
+            point = bar + step * spacing
+            if bar + length - value < abs(value - point):
+                point = bar + length
+            elif step % 2:
+                point += swing * spacing
+            delta = round((point - value) * strength)
+            if delta != 0:
+                moves.append((event, delta))
+
+        keys = self._keys
+        self._keys = None
+        for event, delta in moves:
+            event.time.value += delta
+            off = offs.get(id(event))
+            if off is not None:
+                off.time.value += delta
+        self.keep_sorted = keys is not None
+        self.update()
+
+    def transform(self, *, transpose=0, velocity=1, remap=None, tracks=None,
+                  channels=None, types=None, start=None, end=None):
+        """
+        Edit the notes, velocities and channels of events in one pass.
+
+        The transpose keyword is added to the note numbers of NoteOn, NoteOff
+        and NoteAftertouch events. Their velocities are multiplied by the
+        velocity keyword; a NoteOn event is kept at a velocity of at least 1,
+        so that it does not become a release. The remap keyword is a dict of
+        channels to move events to, by their current channel. Note numbers
+        and velocities are clamped to 0-127.
+
+        Only channel events on the given tracks and channels, of the given
+        event types, and from start until before end are changed, all by
+        default. Types are Event classes, and start and end can be Time
+        objects or bar|beat|tick triples. The sequence is updated first, and
+        the time range is found by bisecting it. Note releases are changed
+        with the notes they end, as paired by NoteIndex, wherever they are,
+        so notes are not split. Releases of no note are changed like other
+        events.
+
+        Events keep their programs. ProgramChange events are added wherever
+        the program of a channel no longer matches the events on it, and
+        again after the changed events where needed. Releases do not get
+        ProgramChange events of their own, since a note plays with the
+        program in effect at its start.
+        """
+        if remap is not None:
+            for channel in remap.values():
+                if not 0 <= channel <= 15:
+                    raise MIDIError(
+                        'Channel out of range: {0}.'.format(channel))
+        if types is not None:
+            types = tuple(types)
+        self.update()
+        low = 0
+        high = len(self)
+        if start is not None:
+            low = _bisect(self, self._time_value(start))
+        if end is not None:
+            high = _bisect(self, self._time_value(end))
+        notes = NoteIndex(self)
+        offs = dict((id(on), off) for on, off in zip(notes.on, notes.off)
+                    if off is not None)
+        released = set(id(off) for off in offs.values())
+
+        def edit(event):
+            if isinstance(event, (NoteOn, NoteOff, NoteAftertouch)):
+                if transpose:
+                    event.note = min(max(event.note + transpose, 0), 127)
+            if isinstance(event, (NoteOn, NoteOff)) and velocity != 1:
+                value = min(max(round(event.velocity * velocity), 0), 127)
+                if value == 0 and isinstance(event, NoteOn):
+                    value = min(event.velocity, 1)
+                event.velocity = value
+            if remap is not None and event.channel in remap:
+                event.channel = remap[event.channel]
+
+        # The edited releases, which can be after the range.
+        waiting = set()
+        for event in self[low:high]:
+            if (not isinstance(event, ChannelEvent) or
+                    isinstance(event, ProgramChange) or
+                    id(event) in released or
+                    types is not None and not isinstance(event, types) or
+                    tracks is not None and event.track not in tracks or
+                    channels is not None and event.channel not in channels):
+                continue
+            edit(event)
+            off = offs.get(id(event))
+            if off is not None:
+                edit(off)
+                waiting.add(id(off))
+        if remap is not None:
+            self._keep_programs(low, high, waiting)
+        self.update()
+
+    def _keep_programs(self, low, high, waiting):
+        """
+        Add ProgramChange events so that events keep their programs.
+
+        Events from low until high, and until every event in waiting is
+        passed, have their channels changed, but not their program
+        attributes. ProgramChange events are added before those whose
+        program differs from the one in effect on their channel, then before
+        the next event of each channel that got one, to put it back.
+        """
+        # The programs in effect, by track and channel, and the
+        # ProgramChange events to add, by the index they go before.
+        programs = dict()
+        for event in self[:low]:
+            if isinstance(event, ChannelEvent):
+                programs[(event.track, event.channel)] = event.program
+        changes = list()
+        keys = set()
+        index = low
+        while index < len(self) and (index < high or len(waiting) > 0):
+            event = self[index]
+            waiting.discard(id(event))
+            if isinstance(event, ChannelEvent) and not _release(event):
+                key = (event.track, event.channel)
+                if (not isinstance(event, ProgramChange) and
+                        programs.get(key, None) != event.program):
+                    changes.append((index, _program(event)))
+                    keys.add(key)
+                programs[key] = event.program
+            index += 1
+        # The events after the changed ones that share a channel with added
+        # ProgramChange events are put back on the program they had.
+        while index < len(self) and len(keys) > 0:
+            event = self[index]
+            if isinstance(event, ChannelEvent):
+                key = (event.track, event.channel)
+                if key in keys and not _release(event):
+                    keys.remove(key)
+                    if (not isinstance(event, ProgramChange) and
+                            programs[key] != event.program):
+                        changes.append((index, _program(event)))
+            index += 1
+        for index, event in reversed(changes):
+            self.insert(index, event)
+
+    @staticmethod
+    def _bar(node):
+        """Get the value of a bar line of a tempo map node, and bar length."""
+        signature = node.signature
+        beat = Time.vpn // signature.denominator
+        start = node.value - (node.beat - 1) * beat - node.tick * Time.vpt
+        return start, beat * signature.numerator
+
+    def _time_value(self, time):
+        """Get the value of a Time object or a bar|beat|tick triple."""
+        if isinstance(time, Time):
+            return time.value
+        value = Time(specification=self.specification)
+        value.triple = time
+        return value.value
+
+    def update(self, *, full=False):
+        """
+        Sort the sequence and derive its tempo map and bookkeeping events.
+
+        SetTempo, SetTimeSignature, ProgramChange and EndTrack events are
+        derived again, and the tempo, signature and program attributes of
+        every event are set. Changes since the last update through the list
+        methods, to the time, track or channel of an event, or to the program
+        of a ProgramChange event, are tracked, and only the tracks they touch
+        are derived again, from the earliest change onwards. Reassigning the
+        tempo of a SetTempo or the signature of a SetTimeSignature event
+        changes the tempo map, so the next update is a full one.
+
+        Changes to tempo, signature or program objects in place are not
+        tracked. If the full keyword is true, the whole sequence is updated.
+        """
+        if not full and self._ends is not None:
+            if self._low is None or self._update_tail():
+                return
+        self._ends = None
+        # Times set in cumulative ticks have no value until there is a tempo
+        # map, which only happens before the first update.
+        pending = len(self.specification) < 1
+        # Tempo, signature and program flags and the time specification are
+        # derived in order, so appended events must be in place first. The
+        # order is that of a sorted sequence, so both derive the same flags.
+        if self._keys is None:
+            order = self._arrange([self._sort_key(event) for event in self])
+        else:
+            order = self._keys
+        # The events that stay, with their sort keys, and the ProgramChange
+        # events to add. Every event that stays has a meta sort key of 3.
+        events = list()
+        keys = list()
+        to_add = list()
+        ends = dict()
+        programs = dict()
+        previous = dict()
         tempo = Tempo()
         signature = TimeSignature()
-        for event in self:
+        # Whether a tempo change follows an event at the same time, which
+        # then has the tempo and signature flags from before it.
+        late = False
+        last = None
+        for event, rank in zip(list.__iter__(self), order):
+            value = rank // (65536 * 8)
             if isinstance(event, SetTempo):
                 tempo = event.tempo
-            else:
-                event.tempo = tempo
-            if isinstance(event, SetTimeSignature):
+                event.signature = signature
+                late = late or value == last
+                continue
+            elif isinstance(event, SetTimeSignature):
                 signature = event.signature
-            else:
+                event.tempo = tempo
+                late = late or value == last
+                continue
+            event.tempo = tempo
+            event.signature = signature
+            if isinstance(event, ChannelEvent):
+                key = (event.track, event.channel)
+                if isinstance(event, ProgramChange):
+                    programs[key] = event.program
+                    continue
+                program = programs.get(key, None)
+                if program is None:
+                    program = programs[key] = Program()
+                event.program = program
+                if program is not previous.get(key, None):
+                    if program != previous.get(key, None):
+                        to_add.append(ProgramChange(
+                            time=Time(value), program=program,
+                            track=event.track, channel=event.channel,
+                            tempo=tempo, signature=signature))
+                    previous[key] = program
+            elif isinstance(event, EndTrack):
+                continue
+            events.append(event)
+            keys.append(rank)
+            ends[event.track] = value
+            last = value
+        self.specification.update()
+
+        # The tempo map events go in the first track, with the flags they
+        # get in order.
+        tempo = Tempo()
+        signature = TimeSignature()
+        for event in self.specification.events(track=0):
+            if isinstance(event, SetTempo):
+                tempo = event.tempo
                 event.signature = signature
+            else:
+                signature = event.signature
+                event.tempo = tempo
+            ends[0] = max(ends.get(0, 0), event.time.value)
+            to_add.append(event)
+        tracks = max(ends) + 1 if len(ends) > 0 else 0
+        ends = dict((track, ends.get(track, 0)) for track in range(tracks))
+        for track, value in ends.items():
+            event = EndTrack(time=Time(value), track=track)
+            node = self.specification.time(event.time)
+            event.tempo = node.tempo
+            event.signature = node.signature
+            to_add.append(event)
+        for event in to_add:
+            event.sequence = self
+            keys.append(self._sort_key(event))
+        events.extend(to_add)
+        order = sorted(range(len(events)), key=keys.__getitem__)
+        list.__setitem__(self, slice(None), [events[index] for index in order])
+        if self._keys is not None:
+            self._keys = [keys[index] for index in order]
+        self._tracks = None
+
+        if late:
+            tempo = Tempo()
+            signature = TimeSignature()
+            for event in self:
+                if isinstance(event, SetTempo):
+                    tempo = event.tempo
+                else:
+                    event.tempo = tempo
+                if isinstance(event, SetTimeSignature):
+                    signature = event.signature
+                else:
+                    event.signature = signature
+        self._ends = ends
+        self._low = None
+        self._dirty = set()
+        if pending and any(event.time._cumulative is not None
+                           for event in list.__iter__(self)):
+            # Their values were taken as 0 above, so sort by the values the
+            # tempo map gives them and derive everything again.
+            if self._keys is not None:
+                self._keys = self._arrange(
+                    [self._sort_key(event) for event in self])
+            self.update(full=True)
+
+    def _arrange(self, keys):
+        """
+        Sort the sequence by a list of keys of its events, if out of order.
+
+        Like sort, but with the keys computed beforehand. The sort is stable,
+        and the keys are returned in the new order.
+        """
+        if any(map(operator.gt, keys, itertools.islice(keys, 1, None))):
+            events = list(list.__iter__(self))
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            list.__setitem__(self, slice(None),
+                             [events[index] for index in order])
+            keys = [keys[index] for index in order]
+            self._tracks = None
+        return keys
+
+    def _update_tail(self):
+        """
+        Update the sequence from the earliest change since the last update.
+
+        Events before the earliest change are sorted and up to date. After
+        it, the events of changed tracks have their ProgramChange and
+        EndTrack events derived again, using the programs in effect before
+        it. Returns False if the changes need a full update instead.
+        """
+        low = self._low
+        dirty = self._dirty
+        start = _bisect(self, low)
+        events = self[start:]
+        events.sort(key=self._sort_key)
+
+        programs = dict()
+        previous = dict()
+        keys = set((event.track, event.channel) for event in events
+                   if event.track in dirty and isinstance(event, ChannelEvent))
+        index = start
+        while len(keys) > 0 and index > 0:
+            index -= 1
+            event = self[index]
+            if isinstance(event, ChannelEvent):
+                key = (event.track, event.channel)
+                if key in keys:
+                    keys.remove(key)
+                    programs[key] = previous[key] = event.program
+
+        tail = list()
+        to_add = list()
+        ends = dict()
+        for event in events:
+            track = event.track
+            if track in dirty:
+                if isinstance(event, EndTrack):
+                    continue
+                elif isinstance(event, ProgramChange):
+                    programs[(track, event.channel)] = event.program
+                    continue
+                elif isinstance(event, ChannelEvent):
+                    key = (track, event.channel)
+                    program = programs.get(key, None)
+                    if program is None:
+                        program = programs[key] = Program()
+                    event.program = program
+                    if program != previous.get(key, None):
+                        previous[key] = program
+                        to_add.append(ProgramChange(
+                            time=Time(event.time.value), program=program,
+                            track=track, channel=event.channel))
+                if not isinstance(event, (SetTempo, SetTimeSignature)):
+                    node = self.specification.time(event.time)
+                    event.tempo = node.tempo
+                    event.signature = node.signature
+                ends[track] = event.time.value
+            tail.append(event)
+        for track in dirty:
+            if track not in ends:
+                index = start
+                while index > 0 and self[index - 1].track != track:
+                    index -= 1
+                if index < 1:
+                    return False
+                # The track now ends before the earliest change, so its
+                # EndTrack goes before events already in place. Start again
+                # from there.
+                self._low = self[index - 1].time.value
+                return self._update_tail()
+            to_add.append(EndTrack(time=Time(ends[track]), track=track))
+
+        for event in to_add:
+            event.sequence = self
+            node = self.specification.time(event.time)
+            event.tempo = node.tempo
+            event.signature = node.signature
+        tail.extend(to_add)
+        tail.sort(key=self._sort_key)
+        list.__setitem__(self, slice(start, None), tail)
+        if self._keys is not None:
+            self._keys[start:] = [self._sort_key(event) for event in tail]
+        if self._tracks is not None:
+            for track in dirty:
+                events = [event for event in self._tracks.get(track, ())
+                          if event.time.value < low]
+                events.extend(event for event in tail if event.track == track)
+                self._tracks[track] = events
+        self._ends.update(ends)
+        self._low = None
+        self._dirty = set()
+        return True
+
+    def _touch(self, event, value=None, track=None):
+        """
+        Record a change to an event for the next update.
+
+        The value and track keywords are the previous time value and track of
+        the event, if they changed. Changes to the tempo map, or to tracks
+        that were not in the sequence, need a full update.
+        """
+        if self._keys is not None and (value is not None or
+                                       track is not None):
+            self._reposition(event, value, track)
+        ends = self._ends
+        if ends is None:
+            return
+        if isinstance(event, (SetTempo, SetTimeSignature)):
+            self._ends = None
+            return
+        low = event.time.value
+        if value is not None and value < low:
+            low = value
+        tracks = set((event.track, event.track if track is None else track))
+        for track in tracks:
+            if track not in ends:
+                self._ends = None
+                return
+            if ends[track] < low:
+                low = ends[track]
+        if self._low is not None and self._low < low:
+            low = self._low
+        self._low = low
+        self._dirty.update(tracks)
+
+    def _reposition(self, event, value=None, track=None):
+        """
+        Move an event of a sorted sequence after its time or track changed.
+
+        The value and track keywords are the previous time value and track.
+        """
+        keys = self._keys
+        if value is None:
+            value = event.time.value
+        if track is None:
+            track = event.track
+        key = (value * 65536 + track) * 8 + self._meta_sort_key(event)
+        index = bisect.bisect_left(keys, key)
+        while index < len(keys) and keys[index] == key:
+            if list.__getitem__(self, index) is event:
+                break
+            index += 1
+        else:
+            # The event is no longer in the sequence.
+            return
+        key = self._sort_key(event)
+        if ((index < 1 or keys[index - 1] <= key) and
+                (index + 1 >= len(keys) or key < keys[index + 1])):
+            keys[index] = key
+        else:
+            del keys[index]
+            list.__delitem__(self, index)
+            index = bisect.bisect_right(keys, key)
+            keys.insert(index, key)
+            list.insert(self, index, event)
+        if self._tracks is not None and event.track in self._tracks:
+            events = self._tracks[event.track]
+            events.remove(event)
+            events.insert(_bisect(events, key, True, self._sort_key), event)
 
     def sort(self, *, key=None, reverse=False):
+        if self._keys is not None:
+            if reverse or key not in (None, self._time_sort_key):
+                raise MIDIError('Cannot reorder a sorted sequence.')
+            return
+        if reverse or key not in (None, self._time_sort_key):
+            self._ends = None
+        self._tracks = None
         if key is None:
-            super().sort(key=self._meta_sort_key, reverse=reverse)
-            super().sort(key=self._track_sort_key, reverse=reverse)
-            super().sort(key=self._time_sort_key, reverse=reverse)
+            super().sort(key=self._sort_key, reverse=reverse)
         else:
             super().sort(key=key, reverse=False)
 
     def append(self, event):
         if isinstance(event, Event):
             event.sequence = self
-            super().append(event)
+            if self._keys is None:
+                super().append(event)
+            else:
+                key = self._sort_key(event)
+                index = bisect.bisect_right(self._keys, key)
+                self._keys.insert(index, key)
+                super().insert(index, event)
+            self._index_add(event)
+            self._touch(event)
         else:
             raise TypeError('Cannot append \'{type}\' to \'Sequence\''.format(
                 type=type(event).__name__))
@@ -1504,55 +2704,883 @@ class Sequence(list):
         for event in events:
             self.append(event)
 
+    def insert(self, index, event):
+        if isinstance(event, Event) and self._keys is not None:
+            self.append(event)
+        elif isinstance(event, Event):
+            index = operator.index(index)
+            if index < 0:
+                index = max(index + len(self), 0)
+            if index < len(self):
+                # Events before the index stay in place.
+                self._touch(self[index])
+            event.sequence = self
+            super().insert(index, event)
+            self._tracks = None
+            self._touch(event)
+        else:
+            raise TypeError(
+                'Cannot insert \'{type}\' into \'Sequence\''.format(
+                type=type(event).__name__))
+
+    def __setitem__(self, index, value):
+        # Every value is checked before the sequence changes.
+        if isinstance(index, slice):
+            value = list(value)
+            events = value
+        else:
+            events = (value,)
+        for event in events:
+            if not isinstance(event, Event):
+                raise TypeError(
+                    'Cannot assign \'{type}\' to \'Sequence\''.format(
+                    type=type(event).__name__))
+        if self._keys is not None:
+            del self[index]
+            self.extend(events)
+        elif isinstance(index, slice):
+            for event in value:
+                event.sequence = self
+            super().__setitem__(index, value)
+            self._ends = None
+            self._tracks = None
+        else:
+            self._touch(self[index])
+            value.sequence = self
+            super().__setitem__(index, value)
+            self._tracks = None
+            self._touch(value)
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            events = self[index]
+        else:
+            events = (self[index],)
+        for event in events:
+            self._index_remove(event)
+            self._touch(event)
+        super().__delitem__(index)
+        if self._keys is not None:
+            del self._keys[index]
+
+    def __iadd__(self, events):
+        self.extend(events)
+        return self
+
+    def __imul__(self, count):
+        self._ends = None
+        self._tracks = None
+        super().__imul__(count)
+        if self._keys is not None:
+            self._keys = None
+            self.keep_sorted = True
+        return self
+
+    def pop(self, index=-1):
+        event = self[index]
+        self._index_remove(event)
+        self._touch(event)
+        if self._keys is not None:
+            self._keys.pop(index)
+        return super().pop(index)
+
+    def remove(self, event):
+        if self._keys is not None:
+            del self[self.index(event)]
+            return
+        super().remove(event)
+        self._index_remove(event)
+        self._touch(event)
+
+    def clear(self):
+        super().clear()
+        self._ends = None
+        self._tracks = None
+        if self._keys is not None:
+            self._keys = list()
+
+    def reverse(self):
+        if self._keys is not None:
+            raise MIDIError('Cannot reorder a sorted sequence.')
+        super().reverse()
+        self._ends = None
+        self._tracks = None
+
     @staticmethod
     def _meta_sort_key(event):
-        if isinstance(event, SetTempo):
-            return 0
-        elif isinstance(event, SetTimeSignature):
-            return 1
+        # Channel events other than ProgramChange are the most common, so
+        # they are found with the fewest checks.
+        if isinstance(event, MetaEvent):
+            if isinstance(event, SetTempo):
+                return 0
+            elif isinstance(event, SetTimeSignature):
+                return 1
+            elif isinstance(event, EndTrack):
+                return 4
         elif isinstance(event, ProgramChange):
             return 2
-        elif isinstance(event, EndTrack):
-            return 4
-        else:
-            return 3
+        return 3
 
     @staticmethod
-    def _track_sort_key(event):
-        return event.track
+    def _sort_key(event):
+        # Equivalent to sorting by meta, track and time keys in turn, since
+        # there are at most 65536 tracks and 8 meta keys.
+        return ((event.time.value * 65536 + event.track) * 8 +
+                Sequence._meta_sort_key(event))
 
     @staticmethod
     def _time_sort_key(event):
-        return event.time
+        return event.time.value
 
-    @staticmethod
-    def _cumulative_sort_key(event):
-        return event.time.cumulative
+    def seconds(self):
+        """
+        Get the time of every event in seconds, as an array of floats.
+
+        Updates the sequence first, then converts the times in sequence order,
+        in one pass over the events alongside the tempo map.
+        """
+        self.update()
+        seconds = array.array('d')
+        nodes = self.specification
+        index = 0
+        node = nodes[0]
+        mpv = node.mpv
+        for event in self:
+            value = event.time.value
+            while index + 1 < len(nodes) and nodes[index + 1].value <= value:
+                index += 1
+                node = nodes[index]
+                mpv = node.mpv
+            microseconds = node.microseconds + (value - node.value) * mpv
+            seconds.append(microseconds / 1000000)
+        return seconds
+
+    def notes(self):
+        """
+        Create a NoteIndex of the notes in the sequence, updating it first.
+
+        The index is not kept up to date with later changes to the sequence.
+        """
+        self.update()
+        return NoteIndex(self)
+
+    def snapshot(self):
+        """
+        Create a SequenceSnapshot of the sequence, updating it first.
+
+        Does not change a sequence that is already up to date.
+        """
+        self.update()
+        return SequenceSnapshot(self)
 
     def __bytes__(self):
         """Bytes for writing to a MIDI file."""
-        array = bytearray()
+        return bytes(self.snapshot())
+
+
+def _loaded(method):
+    """Wrap a Sequence method for LazySequence, to decode every track first."""
+    def wrapper(self, *args, **keywords):
+        if not self._loading:
+            self._load()
+        return method(self, *args, **keywords)
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+def _lazy(cls):
+    """
+    Make every method a LazySequence inherits decode every track first.
+
+    The methods of Sequence and list are wrapped with _loaded as the class is
+    created, so methods added to Sequence later are covered without being
+    listed. Static and class methods, properties, the methods the class
+    defines itself, and those in _lazy_exempt are left alone.
+    """
+    own = set(vars(cls))
+    names = set(vars(Sequence)) | set(vars(list)) | {'__reduce_ex__'}
+    for name in names - own - _lazy_exempt:
+        for base in cls.__mro__[1:]:
+            if name in vars(base):
+                method = vars(base)[name]
+                break
+        if (callable(method) and
+                not isinstance(method, (staticmethod, classmethod))):
+            setattr(cls, name, _loaded(method))
+    return cls
+
+
+# Methods that must work on a partly decoded LazySequence, or that do not
+# touch its events.
+_lazy_exempt = {'__new__', '__init__', '__getattribute__', '__class_getitem__',
+                '__init_subclass__', '__subclasshook__', '__sizeof__'}
+
+
+@_lazy
+class LazySequence(Sequence):
+    """
+    A Sequence that decodes its tracks from the source on first access.
+
+    Created by Sequence.parse with the lazy keyword. Calling track(n) decodes
+    track n and the first track, which holds the tempo map of a format 1
+    file. Any other access to the events decodes every remaining track
+    first. Once every track is decoded, the object becomes a plain Sequence.
+
+    Tempo changes outside the first track only apply to tracks decoded with
+    or after them. The source buffer is kept until every track is decoded.
+    """
+
+    def __init__(self, chunks=list(), **keywords):
+        """
+        Create a LazySequence from a list of MTrk chunk data, one per track.
+
+        Also accepts the keywords of Sequence.
+        """
+        self._pending = dict()
+        self._loading = True
+        super().__init__(**keywords)
+        self._pending = dict(enumerate(chunks))
+        self._count = len(chunks)
+        self._loading = False
+
+    @property
+    def tracks(self):
+        """Get the number of tracks, without decoding any."""
+        tracks = self._count
+        for event in list.__iter__(self):
+            if event.track >= tracks:
+                tracks = event.track + 1
+        return tracks
+
+    def track(self, track):
+        """
+        Get a list of all the events associated with a track number.
+
+        Decodes the track and the first track, if they are not decoded yet.
+        """
+        if not self._loading:
+            self._load((0, track))
+        return [event for event in list.__iter__(self) if event.track == track]
+
+    def _load(self, tracks=None):
+        """Decode some pending tracks, or all of them if tracks is None."""
+        if tracks is None:
+            tracks = list(self._pending)
+        chunks = [(track, self._pending.pop(track))
+                  for track in sorted(set(tracks)) if track in self._pending]
+        if len(chunks) > 0:
+            self._loading = True
+            try:
+                self._unpack_tracks(chunks)
+                Sequence.update(self)
+            finally:
+                self._loading = False
+        if len(self._pending) < 1:
+            del self._pending, self._loading, self._count
+            self.__class__ = Sequence
+
+
+class SequenceSnapshot:
+    """
+    The encoded bytes of a Sequence at one point in time.
+
+    Created by Sequence.snapshot. Each track is encoded once, with cumulative
+    ticks from a single pass over the tempo map, and the snapshot is not
+    affected by later changes to the sequence. Converting it to bytes has no
+    side effects and can be repeated cheaply from any thread.
+    """
+
+    def __init__(self, sequence):
+        """
+        Encode an updated Sequence.
+
+        Use Sequence.snapshot, which updates the sequence first.
+        """
+        self.format = sequence.format
+        self.division = sequence.division
+        tracks = sequence.tracks
         header = bytearray()
-        tracks = self.tracks
         header.extend(self.format.to_bytes(2, 'big'))
         header.extend(tracks.to_bytes(2, 'big'))
-        header.extend(bytes(self.specification.division))
-        chunk = Chunk(header, id='MThd')
-        array.extend(chunk.raw)
-
-        self.sort()
-        self.update()
+        header.extend(bytes(sequence.specification.division))
+        chunks = [Chunk(header, id='MThd').raw]
+        nodes = list(sequence.specification)
         for track in range(tracks):
-            events = self.track(track)
-            chunk = Chunk(id='MTrk')
-            cumulative = 0
-            for event in events:
-                delta = event.time.cumulative - cumulative
-                chunk.extend(_var_int_bytes(delta))
-                chunk.extend(bytes(event))
-                cumulative = event.time.cumulative
-            array.extend(chunk.raw)
-        return bytes(array)
+            data = self._encode(sequence.track(track), nodes,
+                                sequence.running_status)
+            chunks.append(b'MTrk')
+            chunks.append(len(data).to_bytes(4, 'big'))
+            chunks.append(data)
+        self.tracks = tracks
+        self._bytes = b''.join(chunks)
+
+    @staticmethod
+    def _encode(events, nodes, running_status):
+        """
+        Encode the events of a track as MTrk chunk data.
+
+        The events must be sorted by time. Their cumulative ticks are found
+        by walking the tempo map nodes alongside them, and the encoded parts
+        are joined into a buffer of the final size.
+        """
+        parts = list()
+        index = 0
+        node = nodes[0]
+        vpp = node.vpp
+        previous = 0
+        status = None
+        for event in events:
+            value = event.time.value
+            while index + 1 < len(nodes) and nodes[index + 1].value <= value:
+                index += 1
+                node = nodes[index]
+                vpp = node.vpp
+            cumulative = round((value - node.value) / vpp + node.cumulative)
+            parts.append(_var_int_bytes(cumulative - previous))
+            data = bytes(event)
+            if running_status:
+                data, status = _running_status(event, data, status)
+            parts.append(data)
+            previous = cumulative
+        return b''.join(parts)
+
+    def __bytes__(self):
+        """Bytes for writing to a MIDI file."""
+        return self._bytes
+
+    def __len__(self):
+        return len(self._bytes)
+
+    def __repr__(self):
+        return 'SequenceSnapshot({n} tracks, {size} bytes)'.format(
+            n=self.tracks, size=len(self._bytes))
+
+
+class SequenceWriter:
+    """
+    Writes a MIDI file to a binary file object, one event at a time.
+
+    The header is written first, then each track as its events are written,
+    so memory use does not grow with the number of events. In a seekable
+    file, track data is flushed as it accumulates, and the chunk lengths and
+    track count are patched when they are known. Otherwise each track is
+    buffered until it ends, and the number of tracks must be given up front.
+
+    Events are written as given, so unlike Sequence.__bytes__, no
+    ProgramChange or SetTempo events are derived. Events without a sequence
+    get their times from the writer's time specification. SetTempo and
+    SetTimeSignature events extend it as they are written, so they should
+    come first, in the first track of a format 1 file.
+
+    A SequenceWriter can be used as a context manager, which closes it on
+    exit. Closing does not close the file.
+    """
+
+    def __init__(self, file, *, division, format=1, tracks=None,
+                 running_status=False):
+        """
+        Create a SequenceWriter and write the header chunk.
+
+        The division keyword is a TimeDivision, and the optional format
+        keyword defaults to 1. The tracks keyword is the number of tracks,
+        required if the file is not seekable. If running_status is true,
+        tracks are written with running status, as in Sequence.
+        """
+        self.file = file
+        self.format = format
+        self.division = division
+        self.running_status = running_status
+        self.specification = TimeSpecification(division=division)
+        self.specification.update()
+        self.tracks = 0
+        self._count = tracks
+        self._seekable = hasattr(file, 'seekable') and file.seekable()
+        if not self._seekable and tracks is None:
+            raise MIDIError('Track count is required for unseekable files.')
+        self._data = None
+        self._tempo = self.specification[0].tempo
+        self._signature = self.specification[0].signature
+        if self._seekable:
+            self._start = file.tell()
+        header = bytearray()
+        header.extend(format.to_bytes(2, 'big'))
+        header.extend((tracks or 0).to_bytes(2, 'big'))
+        header.extend(bytes(division))
+        file.write(Chunk(header, id='MThd').raw)
+
+    _flush_size = 65536
+
+    def begin_track(self):
+        """Start a new track, ending the current one if needed."""
+        self.end_track()
+        self._data = bytearray()
+        self._size = 0
+        self._cumulative = 0
+        self._status = None
+        if self._seekable:
+            self.file.write(b'MTrk\x00\x00\x00\x00')
+            self._length = self.file.tell() - 4
+
+    def write(self, event):
+        """
+        Write an event at the end of the current track.
+
+        Starts a track if none is open. Events must be written in
+        chronological order within a track. Writing an EndTrack event ends
+        the track.
+        """
+        if self._data is None:
+            self.begin_track()
+        if event.sequence is None:
+            event.time.specification = self.specification
+        cumulative = event.time.cumulative
+        if cumulative < self._cumulative:
+            raise MIDIError('Events must be written in chronological order.')
+        self._data.extend(_var_int_bytes(cumulative - self._cumulative))
+        data = bytes(event)
+        if self.running_status:
+            data, self._status = _running_status(event, data, self._status)
+        self._data.extend(data)
+        self._cumulative = cumulative
+        if isinstance(event, SetTempo):
+            self._tempo = event.tempo
+            self._node(event)
+        elif isinstance(event, SetTimeSignature):
+            self._signature = event.signature
+            self._node(event)
+        if isinstance(event, EndTrack):
+            self._finish()
+        elif self._seekable and len(self._data) >= self._flush_size:
+            self._flush()
+
+    def end_track(self):
+        """
+        End the current track, if one is open.
+
+        An EndTrack event is written if the track does not end with one.
+        """
+        if self._data is not None:
+            self._data.append(0)
+            self._data.extend(bytes(EndTrack()))
+            self._finish()
+
+    def close(self):
+        """
+        End the current track and finish the file.
+
+        Raises a MIDIError if the file is not seekable and the number of
+        tracks written differs from the number given.
+        """
+        self.end_track()
+        if self._seekable:
+            end = self.file.tell()
+            self.file.seek(self._start + 10)
+            self.file.write(self.tracks.to_bytes(2, 'big'))
+            self.file.seek(end)
+        elif self.tracks != self._count:
+            raise MIDIError('Expected {count} tracks, wrote {n}.'.format(
+                count=self._count, n=self.tracks))
+
+    def _node(self, event):
+        """Add a node for a SetTempo or SetTimeSignature event."""
+        self.specification._place(TimeNode(
+            time=event.time, tempo=self._tempo, signature=self._signature,
+            specification=self.specification))
+
+    def _flush(self):
+        """Write the buffered track data to a seekable file."""
+        self.file.write(self._data)
+        self._size += len(self._data)
+        del self._data[:]
+
+    def _finish(self):
+        """Write out the current track and patch its length."""
+        if self._seekable:
+            self._flush()
+            end = self.file.tell()
+            self.file.seek(self._length)
+            self.file.write(self._size.to_bytes(4, 'big'))
+            self.file.seek(end)
+        else:
+            self.file.write(Chunk(self._data, id='MTrk').raw)
+        self._data = None
+        self.tracks += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
+class EventTable:
+    """
+    A columnar view of the events of a MIDI sequence.
+
+    Each event is a row across parallel columns: value (absolute time in Time
+    values), cumulative (absolute time in ticks), track, channel, status,
+    data1, data2, and payload. The columns are array.array objects, so
+    vectorized code can view them without copying, e.g.:
+    numpy.asarray(memoryview(table.data1)). The numpy method does this for
+    every column.
+
+    Channel events store their type (0x80-0xe0) in the status column, their
+    channel, and their one or two data bytes. Meta events store 0xff as their
+    status and their type byte in data1. System exclusive events store their
+    0xf0 or 0xf7 status. The data of a meta or system exclusive event is kept
+    in the payloads list, and its payload column is the index into it.
+    Fields an event does not use are -1.
+    """
+
+    columns = ('value', 'cumulative', 'track', 'channel', 'status', 'data1',
+               'data2', 'payload')
+    _typecodes = {
+        'value': 'q',
+        'cumulative': 'q',
+        'track': 'i',
+        'channel': 'b',
+        'status': 'B',
+        'data1': 'h',
+        'data2': 'h',
+        'payload': 'i'}
+
+    def __init__(self, *, format=None, division=None):
+        """
+        Create an empty EventTable.
+
+        The format and time division of the sequence can be specified with
+        the optional format and division keywords.
+        """
+        self.format = format
+        self.division = division
+        for name in self.columns:
+            setattr(self, name, array.array(self._typecodes[name]))
+        self.payloads = list()
+
+    @staticmethod
+    def parse(source):
+        """
+        Create a new EventTable from a file or bytes.
+
+        Events are decoded straight into the columns, without creating Event
+        objects. Rows are in the chronological order used by Sequence.parse,
+        but the events are kept as stored in the file: unlike a Sequence, the
+        table is not updated, so no ProgramChange, SetTempo or EndTrack
+        events are added or removed.
+
+        Corrupt, truncated, or malformed sources will raise a MIDIError.
+        """
+        buffer = _buffer(source)
+        id, start, offset = Chunk._unpack(buffer, 0, id='MThd')
+        header = buffer[start:offset]
+        table = EventTable(format=int.from_bytes(header[0:2], 'big'),
+                           division=TimeDivision(header[4:6]))
+        tracks = int.from_bytes(header[2:4], 'big')
+        rows = list()
+        keys = list()
+        track = 0
+        for index in range(tracks):
+            id, start, offset = Chunk._unpack(buffer, offset)
+            if id == 'MTrk':
+                for row in _unpack_rows(buffer[start:offset]):
+                    cumulative, status, channel, data1, data2, payload = row
+                    rows.append((track,) + row)
+                    keys.append((cumulative * 65536 + track) * 8 +
+                                EventTable._rank(status, data1))
+                track += 1
+
+        for index in sorted(range(len(rows)), key=keys.__getitem__):
+            track, cumulative, status, channel, data1, data2, payload = (
+                rows[index])
+            table.value.append(0)
+            table.cumulative.append(cumulative)
+            table.track.append(track)
+            table.channel.append(channel)
+            table.status.append(status)
+            table.data1.append(data1)
+            table.data2.append(data2)
+            if payload is None:
+                table.payload.append(-1)
+            else:
+                table.payload.append(len(table.payloads))
+                table.payloads.append(payload)
+        table._values()
+        return table
+
+    def append(self, event):
+        """Add a row for an Event object, at its current time."""
+        if isinstance(event, MetaEvent):
+            self.channel.append(-1)
+            self.status.append(event.status)
+            self.data1.append(event.type)
+            self.data2.append(-1)
+            self.payload.append(len(self.payloads))
+            self.payloads.append(bytes(event._bytes()))
+        elif isinstance(event, SysExEvent):
+            self.channel.append(-1)
+            self.status.append(event.status)
+            self.data1.append(-1)
+            self.data2.append(-1)
+            self.payload.append(len(self.payloads))
+            self.payloads.append(bytes(event.data))
+        else:
+            parameters = event._parameters()
+            self.channel.append(event.channel)
+            self.status.append(event.type)
+            self.data1.append(parameters[0])
+            if len(parameters) > 1:
+                self.data2.append(parameters[1])
+            else:
+                self.data2.append(-1)
+            self.payload.append(-1)
+        self.value.append(event.time.value)
+        self.cumulative.append(event.time.cumulative)
+        self.track.append(event.track)
+
+    def event(self, index):
+        """Create an Event object for the row at index."""
+        status = self.status[index]
+        if status == MetaEvent.status:
+            payload = self.payloads[self.payload[index]]
+            data = bytearray((status, self.data1[index]))
+            data.extend(_var_int_bytes(len(payload)))
+            data.extend(payload)
+        elif status == 0xf0 or status == 0xf7:
+            payload = self.payloads[self.payload[index]]
+            data = bytearray((status,))
+            data.extend(_var_int_bytes(len(payload)))
+            data.extend(payload)
+        else:
+            data = bytearray((status | self.channel[index], self.data1[index]))
+            if self.data2[index] >= 0:
+                data.append(self.data2[index])
+        event = Event.parse(data)
+        event.time = Time(self.value[index])
+        event.track = self.track[index]
+        return event
+
+    def numpy(self):
+        """
+        Get the columns as a dict of NumPy arrays.
+
+        The arrays share memory with the columns, which cannot be appended to
+        while the arrays exist. Requires NumPy.
+        """
+        import numpy
+        return {name: numpy.asarray(memoryview(getattr(self, name)))
+                for name in self.columns}
+
+    def _values(self):
+        """
+        Fill the value column from the cumulative column.
+
+        The tempo map is built from the SetTempo and SetTimeSignature rows
+        alone, so only those rows become Event objects.
+        """
+        conductor = Sequence(division=self.division)
+        tempo = Tempo()
+        signature = TimeSignature()
+        for index in range(len(self)):
+            if (self.status[index] == MetaEvent.status and
+                    self.data1[index] in (0x51, 0x58)):
+                event = self.event(index)
+                conductor.append(event)
+                event.time.cumulative = self.cumulative[index]
+                if isinstance(event, SetTempo):
+                    tempo = event.tempo
+                    event.signature = signature
+                else:
+                    signature = event.signature
+                    event.tempo = tempo
+        conductor.specification.update()
+        lookup = conductor.specification.cumulative
+        for index, cumulative in enumerate(self.cumulative):
+            node = lookup(cumulative)
+            self.value[index] = node.value + round(
+                (cumulative - node.cumulative) * node.vpp)
+
+    @staticmethod
+    def _rank(status, type):
+        """The meta sort key of Sequence, from a status and data1 field."""
+        if status == ChannelEvent._types[ProgramChange]:
+            return 2
+        elif status == MetaEvent.status:
+            return EventTable._meta_ranks.get(type, 3)
+        else:
+            return 3
+
+    _meta_ranks = {0x51: 0, 0x58: 1, 0x2f: 4}
+
+    def __len__(self):
+        return len(self.status)
+
+    def __repr__(self):
+        return 'EventTable({n} events)'.format(n=len(self))
+
+
+Note = collections.namedtuple(
+    'Note', ('start', 'duration', 'track', 'channel', 'note', 'velocity',
+             'on', 'off'))
+
+
+class NoteIndex:
+    """
+    The notes of a MIDI sequence, paired from their NoteOn and NoteOff events.
+
+    A NoteOn event with a velocity of 0 ends a note, like a NoteOff event.
+    Events are paired per track, channel and note number, first on first
+    off, so a note that is struck again before it is released ends at the
+    first release. A note that is never released ends at the EndTrack event
+    of its track, and has no off event. Releases without a note are ignored.
+
+    Notes are kept in order of their start, as rows across parallel columns:
+    start and end (in Time values), track, channel, note and velocity. The
+    columns are array.array objects, like those of EventTable. The on and off
+    lists hold the events of each note.
+
+    The overlapping method finds the notes sounding in an interval of time,
+    using a centered interval tree built with the index, in O(log n + k) time
+    for k notes found.
+    """
+
+    columns = ('start', 'end', 'track', 'channel', 'note', 'velocity')
+    _typecodes = {
+        'start': 'q',
+        'end': 'q',
+        'track': 'i',
+        'channel': 'b',
+        'note': 'b',
+        'velocity': 'b'}
+
+    def __init__(self, sequence):
+        """
+        Create a NoteIndex of the events of an updated Sequence.
+
+        Events are paired in the order of the sequence, which should be
+        sorted.
+        """
+        for name in self.columns:
+            setattr(self, name, array.array(self._typecodes[name]))
+        self.on = list()
+        self.off = list()
+        pending = dict()
+        ends = dict()
+        for event in sequence:
+            if isinstance(event, NoteOn) and event.velocity > 0:
+                key = (event.track, event.channel, event.note)
+                if key not in pending:
+                    pending[key] = collections.deque()
+                pending[key].append(len(self.on))
+                self.start.append(event.time.value)
+                self.end.append(-1)
+                self.track.append(event.track)
+                self.channel.append(event.channel)
+                self.note.append(event.note)
+                self.velocity.append(event.velocity)
+                self.on.append(event)
+                self.off.append(None)
+            elif isinstance(event, (NoteOn, NoteOff)):
+                queue = pending.get((event.track, event.channel, event.note))
+                if queue:
+                    index = queue.popleft()
+                    self.end[index] = event.time.value
+                    self.off[index] = event
+            elif isinstance(event, EndTrack):
+                ends[event.track] = event.time.value
+        for queue in pending.values():
+            for index in queue:
+                self.end[index] = max(ends.get(self.track[index], 0),
+                                      self.start[index])
+        self._root = self._build(range(len(self.on)))
+
+    def overlapping(self, start, end):
+        """
+        Get the notes sounding at any time from start until before end.
+
+        Start and end can be Time objects or Time values. A note sounds from
+        its start until before its end; a note of no duration sounds at its
+        start. Returns a list of Note records in order of their start.
+        """
+        if isinstance(start, Time):
+            start = start.value
+        if isinstance(end, Time):
+            end = end.value
+        found = list()
+        if end <= start:
+            return found
+        nodes = [self._root]
+        while nodes:
+            node = nodes.pop()
+            if node is None:
+                continue
+            center, by_start, by_stop, stops, left, right = node
+            if end <= center:
+                for index in by_start:
+                    if self.start[index] >= end:
+                        break
+                    found.append(index)
+                nodes.append(left)
+            elif start > center:
+                for index in by_stop:
+                    if stops[index] <= start:
+                        break
+                    found.append(index)
+                nodes.append(right)
+            else:
+                found.extend(by_start)
+                nodes.append(left)
+                nodes.append(right)
+        found.sort()
+        return [self[index] for index in found]
+
+    def _build(self, indexes):
+        """
+        Build the centered interval tree of the notes at indexes.
+
+        A node is a tuple of its center, the indexes of the notes that
+        contain the center sorted by start and by stop (descending), a dict
+        of their stops, and its left and right nodes. The stop of a note is
+        its end, or one value after its start if it has no duration. Indexes
+        are in order of start, so the center of each node is the start of
+        its middle note, and the tree is balanced.
+        """
+        if not indexes:
+            return None
+        center = self.start[indexes[len(indexes) // 2]]
+        here = list()
+        left = list()
+        right = list()
+        stops = dict()
+        for index in indexes:
+            stop = max(self.end[index], self.start[index] + 1)
+            if stop <= center:
+                left.append(index)
+            elif self.start[index] > center:
+                right.append(index)
+            else:
+                here.append(index)
+                stops[index] = stop
+        by_stop = sorted(here, key=stops.__getitem__, reverse=True)
+        return (center, here, by_stop, stops, self._build(left),
+                self._build(right))
+
+    def __getitem__(self, index):
+        """Get the Note record at index."""
+        start = self.start[index]
+        return Note(start, self.end[index] - start, self.track[index],
+                    self.channel[index], self.note[index],
+                    self.velocity[index], self.on[index], self.off[index])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __len__(self):
+        return len(self.on)
+
+    def __repr__(self):
+        return 'NoteIndex({n} notes)'.format(n=len(self))
 
 
 class Chunk(bytearray):
@@ -1576,6 +3604,15 @@ class Chunk(bytearray):
     @staticmethod
     def parse(source, id=None):
         chunk = Chunk()
+        if not isinstance(source, collections.Iterator):
+            try:
+                buffer = memoryview(source)
+            except TypeError:
+                pass
+            else:
+                chunk.id, start, end = Chunk._unpack(buffer, 0, id=id)
+                chunk[:] = buffer[start:end]
+                return chunk
         if isinstance(source, io.IOBase):
             if hasattr(source, 'mode'):
                 if 'b' not in source.mode:
@@ -1620,6 +3657,30 @@ class Chunk(bytearray):
                 del chunk[:8]
                 return chunk
 
+    @staticmethod
+    def _unpack(buffer, offset, id=None):
+        """
+        Locate the chunk starting at offset in a buffer, without copying it.
+
+        Returns the chunk ID and the offsets of the start and end of the chunk
+        data. Raises a MIDIError if the chunk is truncated.
+        """
+        header = buffer[offset:offset + 8]
+        if len(header) < 8:
+            raise MIDIError(
+                'Incomplete chunk header. Read {got}/8 bytes.'.format(
+                got=len(header)))
+        chunk_id = str(header[0:4], 'iso8859-1')
+        if id and id != chunk_id:
+            raise MIDIError('{id} chunk not found.'.format(id=id))
+        start = offset + 8
+        end = start + int.from_bytes(header[4:8], 'big')
+        if end > len(buffer):
+            raise MIDIError(
+                'Incomplete {id} chunk. Read {got}/{total} bytes.'.format(
+                got=len(buffer) - offset, total=end - offset, id=chunk_id))
+        return chunk_id, start, end
+
     @property
     def raw(self):
         """Access the raw data, including ID and length bytes."""
@@ -1646,6 +3707,303 @@ class Chunk(bytearray):
             id=repr(self.id), data=repr(bytes(self)[8:]))
 
 
+def iter_events(source, *, merge=False):
+    """
+    Iterate over the events of a MIDI file without building a Sequence.
+
+    Yields (track, cumulative, event) tuples, where cumulative is the absolute
+    time of the event in ticks, also available as event.time.cumulative.
+    Events come in file order, one track after another. If the merge keyword
+    is true, the tracks are merged into the chronological order used by
+    Sequence.parse instead.
+
+    Binary files are read one chunk at a time, so without merging only one
+    track is held in memory. Merging needs every track, but only decodes one
+    event per track ahead.
+
+    Events are yielded as stored in the file: no ProgramChange, SetTempo or
+    EndTrack events are added or removed, and the tempo, signature and
+    program attributes are not set. Corrupt, truncated, or malformed sources
+    will raise a MIDIError.
+    """
+    chunks = _iter_chunks(source)
+    id, header = next(chunks)
+    if id != 'MThd':
+        raise MIDIError('MThd chunk not found.')
+    tracks = list()
+    track = 0
+    for index in range(int.from_bytes(header[2:4], 'big')):
+        id, data = next(chunks)
+        if id == 'MTrk':
+            events = _iter_track(track, data)
+            if merge:
+                tracks.append(_iter_ticks(events))
+            else:
+                yield from events
+            track += 1
+    if merge:
+        def key(item):
+            return (item[1], item[0], Sequence._meta_sort_key(item[2]))
+        yield from heapq.merge(*tracks, key=key)
+
+
+def _iter_track(track, data):
+    """Yield the (track, cumulative, event) tuples of iter_events."""
+    for cumulative, event in _unpack_track(data):
+        event.track = track
+        event.time.cumulative = cumulative
+        yield track, cumulative, event
+
+
+def _iter_ticks(events):
+    """
+    Sort the (track, cumulative, event) tuples of each tick by meta sort key.
+
+    The merge in iter_events needs each track sorted by its merge key.
+    """
+    def key(item):
+        return Sequence._meta_sort_key(item[2])
+    for cumulative, tick in itertools.groupby(events, operator.itemgetter(1)):
+        yield from sorted(tick, key=key)
+
+
+def _iter_chunks(source):
+    """
+    Iterate over the chunks of a MIDI file, yielding (id, data) pairs.
+
+    Binary files are read one chunk at a time. Other sources are viewed with
+    _buffer, and the chunk data are memoryview slices of it. Raises a
+    MIDIError when asked for a chunk past the end of the source.
+    """
+    if isinstance(source, io.IOBase):
+        if hasattr(source, 'mode'):
+            if 'b' not in source.mode:
+                raise MIDIError('Cannot parse text mode file.')
+        while True:
+            chunk = bytearray(source.read(8))
+            if len(chunk) == 8:
+                chunk.extend(source.read(int.from_bytes(chunk[4:8], 'big')))
+            id, start, end = Chunk._unpack(memoryview(chunk), 0)
+            yield id, memoryview(chunk)[start:end]
+    else:
+        buffer = _buffer(source)
+        offset = 0
+        while True:
+            id, start, offset = Chunk._unpack(buffer, offset)
+            yield id, buffer[start:offset]
+
+
+def merge(*sequences):
+    """
+    Merge sequences into a new Sequence, keeping their tracks apart.
+
+    The tracks of each sequence are renumbered to follow those of the
+    sequences before it. Tracks left with no events but EndTrack, such as
+    the conductor tracks of all but the first sequence, are dropped and get
+    no number. Each sequence is updated, so its events are sorted,
+    and their copies are merged with a heap instead of being sorted again.
+    Copies are shallow, as in Sequence.slice.
+
+    Events keep their time values, so the sequences stay aligned by bar and
+    beat whatever their time divisions. If every sequence is in PPQN mode,
+    the result uses the least common multiple of their PPQNs, so every tick
+    of each falls on a tick of the result. If that is over 0x7fff, the most
+    a header can hold, the finest PPQN among them is used instead, and the
+    times of the others may be rounded to its ticks. Otherwise the result
+    uses the division of the first. The tempo map
+    of the first sequence is used, and the SetTempo and SetTimeSignature
+    events of the others are dropped. A sequence whose tempo changes differ
+    from those of the first is re-timed against the first, so its events
+    keep their times in seconds; this needs the time divisions of both.
+    """
+    if len(sequences) < 1:
+        raise MIDIError('No sequences to merge.')
+    first = sequences[0]
+    divisions = [sequence.division for sequence in sequences]
+    if all(division is not None and division.mode == 'ppqn'
+           for division in divisions):
+        ppqn = 1
+        for division in divisions:
+            ppqn = _lcm(ppqn, division.ppqn)
+        if ppqn > 0x7fff:
+            ppqn = max(division.ppqn for division in divisions)
+        division = TimeDivision(ppqn)
+    else:
+        division = first.division
+    merged = list()
+    track = 0
+    first.update()
+    tempos = _tempo_changes(first)
+    for sequence in sequences:
+        sequence.update()
+        conducted = sequence is not first
+        specification = None
+        if conducted and _tempo_changes(sequence) != tempos:
+            if first.division is None or sequence.division is None:
+                raise MIDIError('Cannot merge different tempo maps '
+                                'without time divisions.')
+            specification = first.specification
+        tracks = dict()
+        for number, events in sorted(sequence._track_index().items()):
+            if any(_merged(event, conducted) for event in events):
+                tracks[number] = track
+                track += 1
+        merged.append(_merge_events(sequence, tracks, conducted,
+                                    specification))
+    format = first.format
+    if format == 0 and track > 1:
+        format = 1
+    sequence = Sequence(format=format, division=division,
+                        running_status=first.running_status)
+    sequence.extend(heapq.merge(*merged, key=Sequence._sort_key))
+    sequence.update()
+    return sequence
+
+
+def _lcm(a, b):
+    """Get the least common multiple of two positive integers."""
+    product = a * b
+    while b > 0:
+        a, b = b, a % b
+    return product // a
+
+
+def _merge_events(sequence, tracks, conducted, specification=None):
+    """
+    Yield copies of the events of a sequence for merge.
+
+    The copies are moved to the tracks that tracks maps their tracks to. If
+    conducted is true, the tempo map events are left out. If specification
+    is given, the copies are re-timed to be at the same seconds under it.
+    """
+    time = Time(specification=specification)
+    for event in sequence:
+        if not _merged(event, conducted):
+            continue
+        value = event.time.value
+        if specification is not None:
+            time.seconds = event.time.seconds
+            value = time.value
+        yield _copy(event, value, tracks[event.track])
+
+
+def _merged(event, conducted):
+    """Check whether merge keeps a copy of an event."""
+    if isinstance(event, EndTrack):
+        return False
+    if conducted and isinstance(event, (SetTempo, SetTimeSignature)):
+        return False
+    return True
+
+
+def _tempo_changes(sequence):
+    """Get the times and tempos of the tempo changes of an updated sequence."""
+    changes = list()
+    tempo = None
+    for node in sequence.specification:
+        if node.tempo != tempo:
+            changes.append((node.value, node.tempo))
+            tempo = node.tempo
+    return changes
+
+
+def load_many(paths, *, workers=None, chunksize=1, table=False):
+    """
+    Parse many MIDI files, isolating failures.
+
+    Yields (path, result) tuples, where result is a Sequence, or the exception
+    raised while reading or parsing the file. If the table keyword is true,
+    results are EventTable objects instead, which are much cheaper to send
+    between processes.
+
+    If the workers keyword is given, files are parsed in a pool of that many
+    processes, or one per CPU if it is 0, and results are yielded as they
+    finish, in no particular order. Each task parses chunksize files, which
+    reduces overhead for large numbers of small files. Otherwise files are
+    parsed one at a time in this process, and results come in order.
+
+    A task that fails as a whole, such as one whose worker process was
+    killed, gives its exception as the result of each of its files. Closing
+    the generator early cancels the tasks that have not started.
+    """
+    if chunksize < 1:
+        raise MIDIError('Chunk size out of range: {0}.'.format(chunksize))
+    paths = list(paths)
+    chunks = [paths[index:index + chunksize]
+              for index in range(0, len(paths), chunksize)]
+    if workers is None:
+        return (result for chunk in chunks
+                for result in _load_chunk(chunk, table))
+    return _load_pool(chunks, workers, table)
+
+
+def _load_pool(chunks, workers, table):
+    """Yield the results of load_many from a pool of processes."""
+    executor = concurrent.futures.ProcessPoolExecutor(workers or None)
+    futures = dict()
+    try:
+        futures = dict((executor.submit(_load_chunk, chunk, table), chunk)
+                       for chunk in chunks)
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                results = future.result()
+            except Exception as error:
+                results = [(path, error) for path in futures[future]]
+            yield from results
+    finally:
+        # Cancelled by hand, since shutdown only takes cancel_futures from
+        # Python 3.9.
+        for future in futures:
+            future.cancel()
+        executor.shutdown()
+
+
+def _load_chunk(paths, table):
+    """Parse a list of files for load_many."""
+    parse = EventTable.parse if table else Sequence.parse
+    results = list()
+    for path in paths:
+        try:
+            with open(path, 'rb') as file:
+                results.append((path, parse(file)))
+        except Exception as error:
+            results.append((path, error))
+    return results
+
+
+async def play(sequence, *, clock=time.monotonic, sleep=asyncio.sleep,
+               lookahead=0.001):
+    """
+    Play a sequence in real time, as an asynchronous iterator of its events.
+
+    Events are yielded at their offsets in seconds from the start, following
+    the tempo map. Each offset is measured from the start time on the clock,
+    so delays in sleeping or in the consumer do not accumulate. Events due
+    within the lookahead, in seconds, are yielded together without sleeping,
+    and late events are yielded immediately.
+
+    The clock keyword is a function returning the time in seconds, and the
+    sleep keyword a coroutine function that sleeps for a number of seconds.
+    They default to time.monotonic and asyncio.sleep, and can be replaced to
+    run in virtual time.
+
+    The sequence is updated first, and later changes to it do not affect
+    playback.
+    """
+    seconds = sequence.seconds()
+    events = list(sequence)
+    start = clock()
+    index = 0
+    while index < len(events):
+        now = clock() - start
+        if seconds[index] - now > lookahead:
+            await sleep(seconds[index] - now)
+            continue
+        while index < len(events) and seconds[index] - now <= lookahead:
+            yield events[index]
+            index += 1
+
+
 def _var_int_parse(source):
     """Converts the bytes of a MIDI variable length integer to an int."""
     value = 0
@@ -1661,8 +4019,265 @@ def _var_int_parse(source):
     return value
 
 
+def _var_int_unpack(buffer, offset):
+    """
+    Decode the MIDI variable length integer starting at offset in a buffer.
+
+    Returns the value and the offset of the byte following it.
+    """
+    value = 0
+    for i in range(4):
+        byte = buffer[offset]
+        offset += 1
+        value = (value << 7) | (byte & 0x7f)
+        if ~byte & 0x80:
+            return value, offset
+    raise MIDIError('Incomplete variable length integer.')
+
+
+def _unpack_track(data):
+    """
+    Decode the data of an MTrk chunk.
+
+    Yields (cumulative, event) pairs in file order, where cumulative is the
+    absolute time of the event in ticks. Stops after the EndTrack event, and
+    raises a MIDIError if the data ends before it.
+
+    Channel events may omit their status byte to use running status. Meta
+    and system exclusive events are allowed between them without cancelling
+    it, since many files rely on that.
+    """
+    offset = 0
+    cumulative = 0
+    status = None
+    try:
+        while True:
+            delta = data[offset]
+            if delta & 0x80:
+                delta, offset = _var_int_unpack(data, offset)
+            else:
+                offset += 1
+            if 0x80 <= data[offset] < 0xf0:
+                status = data[offset]
+            event, offset = Event._unpack(data, offset, status)
+            cumulative += delta
+            yield cumulative, event
+            if isinstance(event, EndTrack):
+                return
+    except IndexError:
+        raise MIDIError('Incomplete track. End Track event not found.')
+
+
+def _tick_values(ticks, changes, division):
+    """
+    Convert absolute times in ticks to time values.
+
+    Accepts (cumulative, order, tempo, signature) tempo changes sorted by
+    cumulative and order, where a tempo or signature of None is unchanged.
+    Nodes are placed where the tempo or signature changes, and ticks are
+    converted from the node before them, as TimeSpecification and
+    Time.cumulative would, but in one pass. Returns a list of time values.
+    """
+    def vpp(tempo):
+        if division.mode == 'ppqn':
+            return Time.vpqn / division.ppqn
+        return Time.vpqn / (division.pps / tempo.bps)
+    tempo = Tempo()
+    signature = TimeSignature()
+    nodes = [0]
+    values = [0]
+    vpps = [vpp(tempo)]
+    for cumulative, order, new_tempo, new_signature in changes:
+        if new_tempo is None:
+            new_tempo = tempo
+        if new_signature is None:
+            new_signature = signature
+        if new_tempo == tempo and new_signature == signature:
+            continue
+        tempo = new_tempo
+        signature = new_signature
+        if nodes[-1] == cumulative:
+            vpps[-1] = vpp(tempo)
+        else:
+            values.append(values[-1] +
+                          round((cumulative - nodes[-1]) * vpps[-1]))
+            nodes.append(cumulative)
+            vpps.append(vpp(tempo))
+    if len(set(vpps)) == 1 and vpps[0] == int(vpps[0]):
+        # Nothing is rounded, so every tick is the same number of values.
+        step = int(vpps[0])
+        return [cumulative * step for cumulative in ticks]
+    result = list()
+    for cumulative in ticks:
+        index = bisect.bisect_right(nodes, cumulative) - 1
+        result.append(values[index] +
+                      round((cumulative - nodes[index]) * vpps[index]))
+    return result
+
+
+def _unpack_rows(data):
+    """
+    Decode the data of an MTrk chunk without creating Event objects.
+
+    Yields (cumulative, status, channel, data1, data2, payload) tuples in file
+    order, with the fields used by EventTable. The payload of a meta or system
+    exclusive event is a bytes object, and None for channel events. Running
+    status is handled as in _unpack_track. Stops after the EndTrack event,
+    and raises a MIDIError if the data ends before it.
+    """
+    offset = 0
+    cumulative = 0
+    running = None
+    try:
+        while True:
+            delta = data[offset]
+            if delta & 0x80:
+                delta, offset = _var_int_unpack(data, offset)
+            else:
+                offset += 1
+            cumulative += delta
+            status = data[offset]
+            if status < 0x80:
+                if running is None:
+                    raise MIDIError(
+                        'Running status without a previous status.')
+                status = running
+            else:
+                offset += 1
+                if status < 0xf0:
+                    running = status
+            if status == MetaEvent.status:
+                type = data[offset]
+                if type not in MetaEvent._events:
+                    raise MIDIError(
+                        'Unknown Meta Event type: {0:X}.'.format(type))
+                length, offset = _var_int_unpack(data, offset + 1)
+                payload = data[offset:offset + length]
+                if len(payload) < length:
+                    raise IndexError('Meta event data is truncated.')
+                offset += length
+                yield cumulative, status, -1, type, -1, bytes(payload)
+                if type == MetaEvent._types[EndTrack]:
+                    return
+            elif status == 0xf7 or status == 0xf0:
+                length, offset = _var_int_unpack(data, offset)
+                payload = data[offset:offset + length]
+                if len(payload) < length:
+                    raise IndexError('System exclusive data is truncated.')
+                offset += length
+                yield cumulative, status, -1, -1, -1, bytes(payload)
+            else:
+                type = status & 0xf0
+                if type not in ChannelEvent._events:
+                    raise MIDIError(
+                        'Encountered an unknown event: {status:X}.'.format(
+                        status=status))
+                if type == 0xc0 or type == 0xd0:
+                    yield (cumulative, type, status & 0x0f, data[offset], -1,
+                           None)
+                    offset += 1
+                else:
+                    yield (cumulative, type, status & 0x0f, data[offset],
+                           data[offset + 1], None)
+                    offset += 2
+    except IndexError:
+        raise MIDIError('Incomplete track. End Track event not found.')
+
+
+def _bisect(events, value, right=False, key=None):
+    """
+    Find where a time value belongs in a list of events sorted by time.
+
+    Works like bisect.bisect_left on the time values of the events, or like
+    bisect.bisect_right if right is true. If a key function is given, it is
+    used instead of the time value.
+    """
+    low = 0
+    high = len(events)
+    while low < high:
+        middle = (low + high) // 2
+        if key is None:
+            time = events[middle].time.value
+        else:
+            time = key(events[middle])
+        if time < value or right and time == value:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def _copy(event, value, track=None):
+    """
+    Make a shallow copy of an event, outside any sequence.
+
+    The copy has a new Time at value, and is moved to track if given.
+    """
+    clone = copy.copy(event)
+    clone.sequence = None
+    clone.time = Time(value)
+    if track is not None:
+        clone.track = track
+    return clone
+
+
+def _program(event):
+    """Make a ProgramChange for the program of a channel event, before it."""
+    return ProgramChange(program=event.program, time=Time(event.time.value),
+                         track=event.track, channel=event.channel)
+
+
+def _release(event):
+    """Check whether an event is a note release."""
+    return (isinstance(event, NoteOff) or
+            isinstance(event, NoteOn) and event.velocity == 0)
+
+
+def _running_status(event, data, status):
+    """
+    Apply running status to the bytes of an event.
+
+    Given the running status left by the previous event in the track, returns
+    the bytes to write and the new running status. Meta events reset it.
+    """
+    if not isinstance(event, ChannelEvent):
+        return data, None
+    elif data[0] == status:
+        return data[1:], status
+    else:
+        return data, data[0]
+
+
+def _buffer(source):
+    """
+    Get a memoryview of a MIDI source.
+
+    Bytes-like objects, including mmap objects, are viewed without copying.
+    Binary files are read to the end, and other iterables of ints or bytes
+    are collected into a bytearray.
+    """
+    if isinstance(source, io.IOBase):
+        if hasattr(source, 'mode'):
+            if 'b' not in source.mode:
+                raise MIDIError('Cannot parse text mode file.')
+        return memoryview(source.read())
+    try:
+        return memoryview(source)
+    except TypeError:
+        pass
+    data = bytearray()
+    for item in source:
+        if isinstance(item, int):
+            data.append(item)
+        else:
+            data.extend(item)
+    return memoryview(data)
+
+
 def _var_int_bytes(value):
     """Convent an int to the bytes of a MIDI variable length integer."""
+    if 0 <= value < 0x80:
+        return bytes((value,))
     array = bytearray()
     for i in range(4):
         array.append((value & 0x7f) | 0x80)
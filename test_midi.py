@@ -0,0 +1,820 @@
+#!/usr/bin/env python3
+#
+#   Copyright (C) 2013 Alethea Butler.
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+
+"""Tests for the midi module."""
+
+import asyncio
+import collections
+import io
+import os
+import random
+import tempfile
+import unittest
+
+import midi
+
+
+def build():
+    """Create an updated two track sequence with a tempo change."""
+    sequence = midi.Sequence(format=1, division=midi.TimeDivision(480))
+    sequence.append(midi.SetTempo(500000, time=midi.Time(0), track=0))
+    sequence.append(midi.SetTimeSignature(
+        midi.TimeSignature(4, 4), time=midi.Time(0), track=0))
+    sequence.append(midi.SetTempo(
+        400000, time=midi.Time(8 * midi.Time.vpqn), track=0))
+    sequence.append(midi.ProgramChange(
+        40, time=midi.Time(0), track=1, channel=0))
+    for beat in range(32):
+        sequence.append(midi.NoteOn(
+            60 + beat % 12, 100, time=midi.Time(beat * midi.Time.vpqn),
+            track=1, channel=0))
+        sequence.append(midi.NoteOff(
+            60 + beat % 12, 0, time=midi.Time((beat + 1) * midi.Time.vpqn),
+            track=1, channel=0))
+    sequence.update()
+    return sequence
+
+
+def state(sequence):
+    """Get what update derives for each event, and the encoded sequence."""
+    events = list()
+    for event in sequence:
+        program = getattr(event, 'program', None)
+        events.append((
+            type(event).__name__, event.track, event.time.value,
+            event.time.triple, event.time.cumulative,
+            event.tempo.mpqn if event.tempo is not None else None,
+            event.signature.numerator if event.signature is not None
+            else None,
+            program.number if program is not None else None))
+    return events, bytes(sequence)
+
+
+class UpdateTest(unittest.TestCase):
+    """Incremental updates must match full updates after each edit."""
+
+    def assertUpdates(self, edit):
+        incremental = build()
+        full = build()
+        before = state(incremental)
+        edit(incremental)
+        edit(full)
+        incremental.update()
+        full.update(full=True)
+        self.assertEqual(state(incremental), state(full))
+        self.assertNotEqual(state(incremental), before)
+
+    def first(self, sequence, cls):
+        return [event for event in sequence if isinstance(event, cls)][0]
+
+    def test_signature(self):
+        def edit(sequence):
+            event = self.first(sequence, midi.SetTimeSignature)
+            event.signature = midi.TimeSignature(3, 4)
+        self.assertUpdates(edit)
+
+    def test_tempo(self):
+        def edit(sequence):
+            event = self.first(sequence, midi.SetTempo)
+            event.tempo = midi.Tempo(mpqn=1000000)
+        self.assertUpdates(edit)
+
+    def test_program(self):
+        def edit(sequence):
+            event = self.first(sequence, midi.ProgramChange)
+            event.program = midi.Program(10)
+        self.assertUpdates(edit)
+
+    def test_time(self):
+        def edit(sequence):
+            event = self.first(sequence, midi.NoteOn)
+            event.time = midi.Time(40 * midi.Time.vpqn)
+        self.assertUpdates(edit)
+
+    def test_channel(self):
+        def edit(sequence):
+            self.first(sequence, midi.NoteOn).channel = 3
+        self.assertUpdates(edit)
+
+    def test_track(self):
+        def edit(sequence):
+            self.first(sequence, midi.NoteOn).track = 2
+        self.assertUpdates(edit)
+
+    def test_division(self):
+        def edit(sequence):
+            sequence.division = midi.TimeDivision(960)
+        self.assertUpdates(edit)
+
+    def test_end(self):
+        def edit(sequence):
+            for event in sequence.track(1)[40:-1]:
+                event.track = 2
+            last = midi.NoteOn(72, 100, time=midi.Time(40 * midi.Time.vpqn),
+                               track=1, channel=0)
+            sequence.append(last)
+            sequence.update()
+            sequence.remove(last)
+        self.assertUpdates(edit)
+
+    def test_cumulative(self):
+        for division in (midi.TimeDivision(480),
+                         midi.TimeDivision(frames=25, subframes=40)):
+            for keep_sorted in (False, True):
+                sequence = midi.Sequence(format=1, division=division,
+                                         keep_sorted=keep_sorted)
+                sequence.append(midi.SetTempo(500000, time=midi.Time(0),
+                                              track=0))
+                sequence.append(midi.SetTempo(
+                    250000, time=midi.Time(2 * midi.Time.vpqn), track=0))
+                for cumulative in (960, 0, 480, 1440):
+                    event = midi.NoteOn(60, 100, track=1, channel=0)
+                    sequence.append(event)
+                    event.time.cumulative = cumulative
+                sequence.update()
+                self.assertEqual(
+                    [event.time.cumulative for event in sequence.track(1)],
+                    [0, 0, 480, 960, 1440, 1440])
+                seconds = list(sequence.seconds())
+                self.assertEqual(seconds, sorted(seconds))
+                parsed = midi.Sequence.parse(bytes(sequence))
+                self.assertEqual(state(parsed), state(sequence))
+
+
+class SortedTest(unittest.TestCase):
+    """Sorted sequences must update like others and reject bad edits."""
+
+    def test_program(self):
+        results = list()
+        for keep_sorted in (False, True):
+            sequence = build()
+            sequence.keep_sorted = keep_sorted
+            sequence.append(midi.ProgramChange(
+                10, time=midi.Time(8 * midi.Time.vpqn), track=1, channel=0))
+            sequence.append(midi.NoteOn(
+                72, 100, time=midi.Time(8 * midi.Time.vpqn), track=1,
+                channel=0))
+            sequence.update()
+            results.append(state(sequence))
+        self.assertEqual(results[0], results[1])
+
+    def test_setitem_type(self):
+        sequence = build()
+        sequence.keep_sorted = True
+        events = list(sequence)
+        with self.assertRaises(TypeError):
+            sequence[0] = 5
+        with self.assertRaises(TypeError):
+            sequence[0:2] = [sequence[0], 5]
+        self.assertEqual(list(sequence), events)
+
+
+class TrackTest(unittest.TestCase):
+    """Track lists must follow sequence order, whether indexed or not."""
+
+    def assertOrder(self, edit):
+        for keep_sorted in (False, True):
+            for indexed in (False, True):
+                sequence = midi.Sequence(format=1, keep_sorted=keep_sorted,
+                                         division=midi.TimeDivision(480))
+                for note, track in ((61, 1), (62, 2)):
+                    sequence.append(midi.NoteOn(
+                        note, 100, time=midi.Time(2 * midi.Time.vpqn),
+                        track=track, channel=0))
+                if indexed:
+                    sequence.track(1)
+                edit(sequence)
+                for track in (1, 2):
+                    self.assertEqual(
+                        sequence.track(track),
+                        [event for event in sequence if event.track == track])
+
+    def test_append(self):
+        def edit(sequence):
+            sequence.append(midi.NoteOn(60, 100, time=midi.Time(0), track=1,
+                                        channel=0))
+        self.assertOrder(edit)
+
+    def test_move(self):
+        def edit(sequence):
+            sequence.append(midi.NoteOn(60, 100, time=midi.Time(0), track=2,
+                                        channel=0))
+            sequence.track(1)
+            [event for event in sequence if event.note == 62][0].track = 1
+        self.assertOrder(edit)
+
+
+class SliceTest(unittest.TestCase):
+    """Slices must not have hanging notes or releases without notes."""
+
+    def test_notes(self):
+        sequence = build()
+        part = sequence.slice((1, 2, 240), (1, 4, 240))
+        notes = part.notes()
+        self.assertEqual([note.note for note in notes], [62, 63])
+        self.assertEqual(
+            [note.duration for note in notes],
+            [midi.Time.vpqn, midi.Time.vpqn // 2])
+        self.assertEqual(
+            sum(1 for event in part if isinstance(event, midi.NoteOff)), 2)
+
+
+class QuantizeTest(unittest.TestCase):
+    """Quantized notes must snap to the grid of each bar and keep lengths."""
+
+    def build(self, notes, signature=None):
+        sequence = midi.Sequence(format=1, division=midi.TimeDivision(480))
+        sequence.append(midi.SetTimeSignature(
+            midi.TimeSignature(4, 4), time=midi.Time(0), track=0))
+        if signature is not None:
+            sequence.append(midi.SetTimeSignature(
+                signature, time=midi.Time(1920 * midi.Time.vpt), track=0))
+        for note, tick, duration, track, channel in notes:
+            for event in (midi.NoteOn(note, 100), midi.NoteOff(note, 0)):
+                if isinstance(event, midi.NoteOff):
+                    tick += duration
+                event.time = midi.Time(tick * midi.Time.vpt)
+                event.track = track
+                event.channel = channel
+                sequence.append(event)
+        sequence.update()
+        return sequence
+
+    def ticks(self, sequence):
+        return dict((note.note, (note.start // midi.Time.vpt,
+                                 note.duration // midi.Time.vpt))
+                    for note in sequence.notes())
+
+    def test_bar_lines(self):
+        notes = [(60, 100, 240, 1, 0), (61, 1800, 240, 1, 0),
+                 (62, 2000, 240, 1, 0), (63, 3170, 240, 1, 0)]
+        sequence = self.build(notes, midi.TimeSignature(3, 4))
+        sequence.quantize(960)
+        self.assertEqual(self.ticks(sequence), {
+            60: (0, 240), 61: (1920, 240), 62: (1920, 240),
+            63: (3360, 240)})
+        sequence = self.build(notes)
+        sequence.quantize(960)
+        self.assertEqual(self.ticks(sequence)[63], (2880, 240))
+
+    def test_strength_swing(self):
+        notes = [(60, 300, 100, 1, 0), (61, 500, 100, 1, 0)]
+        sequence = self.build(notes)
+        sequence.quantize(240, strength=0.5)
+        self.assertEqual(self.ticks(sequence), {60: (270, 100),
+                                                61: (490, 100)})
+        sequence = self.build(notes)
+        sequence.quantize(240, swing=0.5)
+        self.assertEqual(self.ticks(sequence), {60: (360, 100),
+                                                61: (480, 100)})
+
+    def test_filters(self):
+        notes = [(60, 100, 600, 1, 0), (61, 100, 600, 1, 1),
+                 (62, 100, 600, 2, 0)]
+        sequence = self.build(notes)
+        sequence.quantize(480, tracks={1}, channels={0})
+        self.assertEqual(self.ticks(sequence), {
+            60: (0, 600), 61: (100, 600), 62: (100, 600)})
+
+    def test_releases(self):
+        sequence = self.build([(60, 100, 600, 1, 0), (60, 130, 600, 1, 0)])
+        sequence.quantize(480)
+        self.assertEqual(
+            [(type(event), event.time.value // midi.Time.vpt)
+             for event in sequence.track(1)
+             if isinstance(event, (midi.NoteOn, midi.NoteOff))],
+            [(midi.NoteOn, 0), (midi.NoteOn, 0), (midi.NoteOff, 600),
+             (midi.NoteOff, 600)])
+        self.assertEqual([note.duration for note in sequence.notes()],
+                         [600 * midi.Time.vpt] * 2)
+
+    def test_grid(self):
+        with self.assertRaises(midi.MIDIError):
+            build().quantize(0)
+
+
+class MergeTest(unittest.TestCase):
+    """Merged sequences must keep their times, without empty tracks."""
+
+    def seconds(self, sequence, track):
+        return [round(event.time.seconds, 3) for event in sequence
+                if isinstance(event, midi.NoteOn) and event.track == track]
+
+    def test_tempo_maps(self):
+        first = build()
+        second = build()
+        second[0].tempo = midi.Tempo(mpqn=250000)
+        second.update()
+        merged = midi.merge(first, second)
+        self.assertEqual(self.seconds(merged, 1), self.seconds(first, 1))
+        self.assertEqual(self.seconds(merged, 2), self.seconds(second, 1))
+
+    def test_same_tempo_maps(self):
+        first = build()
+        merged = midi.merge(first, build())
+        self.assertEqual(
+            [event.time.value for event in merged if event.track == 2],
+            [event.time.value for event in first if event.track == 1])
+
+    def test_conductor_tracks(self):
+        merged = midi.merge(build(), build(), build())
+        self.assertEqual(merged.tracks, 4)
+        for track in range(merged.tracks):
+            self.assertGreater(len(merged.track(track)), 1)
+
+    def part(self, ppqn, ticks):
+        sequence = midi.Sequence(format=1, division=midi.TimeDivision(ppqn))
+        for tick in ticks:
+            event = midi.NoteOn(60, 100, track=1, channel=0)
+            sequence.append(event)
+            event.time.cumulative = tick
+        sequence.update()
+        return sequence
+
+    def test_divisions(self):
+        ticks = (1, 2, 3, 5, 7)
+        first = self.part(96, ticks)
+        second = self.part(120, ticks)
+        merged = midi.Sequence.parse(bytes(midi.merge(first, second)))
+        self.assertEqual(merged.division.ppqn, 480)
+        for track, part in ((1, first), (2, second)):
+            self.assertEqual(
+                [event.time.value for event in merged.track(track)][:-1],
+                [event.time.value for event in part.track(1)][:-1])
+        merged = midi.merge(self.part(1000, ticks), self.part(999, ticks))
+        self.assertEqual(merged.division.ppqn, 1000)
+
+
+class TransformTest(unittest.TestCase):
+    """Transformed notes must keep their releases and programs."""
+
+    def programs(self, sequence):
+        return [(event.channel, event.program.number) for event in sequence
+                if isinstance(event, midi.NoteOn)]
+
+    def assertPaired(self, sequence, unreleased=0):
+        notes = sequence.notes()
+        offs = sum(1 for event in sequence
+                   if isinstance(event, midi.NoteOff))
+        self.assertEqual(len(notes) - unreleased, offs)
+        for note in notes:
+            if note.off is not None:
+                self.assertEqual(note.off.note, note.on.note)
+
+    def test_remap_program(self):
+        sequence = build()
+        sequence.append(midi.ProgramChange(
+            20, time=midi.Time(0), track=1, channel=1))
+        sequence.append(midi.NoteOn(
+            60, 100, time=midi.Time(40 * midi.Time.vpqn), track=1,
+            channel=1))
+        sequence.update()
+        sequence.transform(remap={0: 1}, start=midi.Time(4 * midi.Time.vpqn),
+                           end=midi.Time(12 * midi.Time.vpqn))
+        parsed = midi.Sequence.parse(bytes(sequence))
+        parsed.update()
+        for sequence in (sequence, parsed):
+            programs = self.programs(sequence)
+            self.assertEqual(programs[:4], [(0, 41)] * 4)
+            self.assertEqual(programs[4:12], [(1, 41)] * 8)
+            self.assertEqual(programs[12:32], [(0, 41)] * 20)
+            self.assertEqual(programs[32:], [(1, 21)])
+            self.assertPaired(sequence, 1)
+
+    def test_remap_destination(self):
+        sequence = midi.Sequence(format=1, division=midi.TimeDivision(480))
+        for channel, program in ((0, 10), (1, 40)):
+            sequence.append(midi.ProgramChange(
+                program, time=midi.Time(0), track=1, channel=channel))
+        for beat in range(8):
+            for event in (midi.NoteOn(60, 100), midi.NoteOff(60, 0)):
+                event.time = midi.Time((beat + isinstance(
+                    event, midi.NoteOff)) * midi.Time.vpqn)
+                event.track = 1
+                event.channel = beat % 2
+                sequence.append(event)
+        sequence.update()
+        before = [program for _, program in self.programs(sequence)]
+        sequence.transform(remap={0: 1})
+        parsed = midi.Sequence.parse(bytes(sequence))
+        parsed.update()
+        for sequence in (sequence, parsed):
+            self.assertEqual(self.programs(sequence),
+                             [(1, program) for program in before])
+            self.assertPaired(sequence)
+
+    def test_transpose_range(self):
+        sequence = build()
+        sequence.transform(transpose=2, start=(1, 2, 240), end=(1, 4, 240))
+        notes = [event.note for event in sequence
+                 if isinstance(event, midi.NoteOn)]
+        self.assertEqual(notes[:4], [60, 61, 64, 65])
+        self.assertPaired(sequence)
+
+
+class LazyTest(unittest.TestCase):
+    """Lazily parsed sequences must match eagerly parsed ones."""
+
+    def source(self):
+        sequence = build()
+        for beat in range(4):
+            sequence.append(midi.NoteOn(
+                48, 90, time=midi.Time(beat * 4 * midi.Time.vpqn), track=2,
+                channel=1))
+            sequence.append(midi.NoteOff(
+                48, 0, time=midi.Time((beat * 4 + 2) * midi.Time.vpqn),
+                track=2, channel=1))
+        sequence.update()
+        return bytes(sequence)
+
+    def test_track(self):
+        source = self.source()
+        lazy = midi.Sequence.parse(source, lazy=True)
+        eager = midi.Sequence.parse(source)
+        self.assertEqual(lazy.tracks, 3)
+        for track in (2, 1):
+            self.assertEqual(
+                [(type(event), event.time.value, bytes(event))
+                 for event in lazy.track(track)],
+                [(type(event), event.time.value, bytes(event))
+                 for event in eager.track(track)])
+            if track == 2:
+                self.assertIsInstance(lazy, midi.LazySequence)
+
+    def test_equal(self):
+        source = self.source()
+        lazy = midi.Sequence.parse(source, lazy=True)
+        eager = midi.Sequence.parse(source)
+        self.assertEqual(state(lazy), state(eager))
+        self.assertIs(type(lazy), midi.Sequence)
+        self.assertEqual(bytes(lazy), source)
+
+
+class IterEventsTest(unittest.TestCase):
+    """Merged events must come in the order Sequence.parse sorts them."""
+
+    def test_merge(self):
+        sequence = build()
+        sequence.append(midi.ControlChange(
+            7, 100, time=midi.Time(0), track=2, channel=1))
+        sequence.append(midi.NoteOn(
+            48, 90, time=midi.Time(8 * midi.Time.vpqn), track=2, channel=1))
+        sequence.update()
+        source = bytes(sequence)
+        parsed = [(event.track, event.time.cumulative, bytes(event))
+                  for event in midi.Sequence.parse(source)]
+        for merged in (source, io.BytesIO(source)):
+            self.assertEqual(
+                [(track, cumulative, bytes(event)) for track, cumulative,
+                 event in midi.iter_events(merged, merge=True)], parsed)
+
+
+class Unseekable(io.RawIOBase):
+    """A binary file that can only be written, like a pipe."""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+
+class WriterTest(unittest.TestCase):
+    """Written files must match the bytes of the sequence they came from."""
+
+    def write(self, sequence, file, **keywords):
+        with midi.SequenceWriter(
+                file, division=sequence.division, **keywords) as writer:
+            for track in range(sequence.tracks):
+                writer.begin_track()
+                for event in sequence.track(track):
+                    writer.write(event)
+
+    def test_seekable(self):
+        sequence = build()
+        file = io.BytesIO(b'prefix')
+        file.seek(0, io.SEEK_END)
+        self.write(sequence, file)
+        self.assertEqual(file.getvalue(), b'prefix' + bytes(sequence))
+        self.assertEqual(state(midi.Sequence.parse(file.getvalue()[6:])),
+                         state(sequence))
+
+    def test_unseekable(self):
+        sequence = build()
+        file = Unseekable()
+        self.write(sequence, file, tracks=sequence.tracks)
+        self.assertEqual(file.buffer.getvalue(), bytes(sequence))
+        with self.assertRaises(midi.MIDIError):
+            midi.SequenceWriter(Unseekable(), division=sequence.division)
+        with self.assertRaises(midi.MIDIError):
+            self.write(sequence, Unseekable(), tracks=sequence.tracks + 1)
+
+    def test_flush(self):
+        sequence = build()
+        file = io.BytesIO()
+        writer = midi.SequenceWriter(file, division=sequence.division)
+        writer._flush_size = 16
+        with writer:
+            for event in sequence.track(0):
+                writer.write(event)
+            for event in sequence.track(1):
+                writer.write(event)
+        self.assertEqual(file.getvalue(), bytes(sequence))
+
+
+class EncodingTest(unittest.TestCase):
+    """SysEx packets and running status must survive a round trip."""
+
+    def events(self, sequence):
+        return [(type(event), event.track, event.time.value,
+                 getattr(event, 'status', None), bytes(event))
+                for event in sequence]
+
+    def test_sysex_packets(self):
+        sequence = build()
+        packets = [(0xf0, b'\x43\x12\x00'), (0xf7, b'\x01\x02'),
+                    (0xf7, b'\x03\xf7')]
+        for beat, (status, data) in zip((2, 2, 3), packets):
+            sequence.append(midi.SysExEvent(
+                data, status=status, time=midi.Time(beat * midi.Time.vpqn),
+                track=1))
+        sequence.update()
+        parsed = midi.Sequence.parse(bytes(sequence))
+        self.assertEqual(self.events(parsed), self.events(sequence))
+        self.assertEqual(
+            [(event.status, bytes(event.data)) for event in parsed
+             if isinstance(event, midi.SysExEvent)], packets)
+
+    def test_running_status(self):
+        sequence = build()
+        for note in (72, None, 76, 79):
+            if note is None:
+                event = midi.SysExEvent(b'\x7e\x7f\x09\x01\xf7')
+            else:
+                event = midi.NoteOn(note, 80, channel=1)
+            event.time = midi.Time(2 * midi.Time.vpqn)
+            event.track = 1
+            sequence.append(event)
+        for note in (72, 76, 79):
+            sequence.append(midi.NoteOff(
+                note, 0, time=midi.Time(3 * midi.Time.vpqn), track=1,
+                channel=1))
+        sequence.update()
+        plain = bytes(sequence)
+        sequence.running_status = True
+        running = bytes(sequence)
+        self.assertLess(len(running), len(plain))
+        parsed = midi.Sequence.parse(running)
+        self.assertEqual(self.events(parsed), self.events(sequence))
+        self.assertEqual(state(parsed)[0], state(sequence)[0])
+        parsed.running_status = True
+        self.assertEqual(bytes(parsed), running)
+
+
+class NoteIndexTest(unittest.TestCase):
+    """Interval queries must find the notes a plain scan finds."""
+
+    def build(self, seed):
+        generator = random.Random(seed)
+        sequence = midi.Sequence(format=1, division=midi.TimeDivision(480))
+        for index in range(200):
+            start = generator.randrange(64) * midi.Time.vpqn // 4
+            track = generator.randrange(1, 3)
+            note = generator.randrange(60, 72)
+            sequence.append(midi.NoteOn(
+                note, 100, time=midi.Time(start), track=track, channel=0))
+            kind = generator.randrange(4)
+            if kind == 0:
+                # Left sounding until the end of its track.
+                continue
+            elif kind == 1:
+                # Released at once, with no duration.
+                duration = 0
+            else:
+                duration = generator.randrange(1, 16) * midi.Time.vpqn // 4
+            if kind == 3:
+                release = midi.NoteOn(note, 0)
+            else:
+                release = midi.NoteOff(note, 0)
+            release.time = midi.Time(start + duration)
+            release.track = track
+            release.channel = 0
+            sequence.append(release)
+        sequence.update()
+        return sequence.notes()
+
+    def scan(self, index, start, end):
+        return [note for note in index
+                if start < end and note.start < end and
+                max(note.start + note.duration, note.start + 1) > start]
+
+    def test_overlapping(self):
+        kinds = set()
+        for seed in range(10):
+            index = self.build(seed)
+            kinds.update((type(note.off), note.duration == 0)
+                         for note in index)
+            step = midi.Time.vpqn // 8
+            for start in range(-step, 84 * midi.Time.vpqn // 4, step * 3):
+                for length in (0, 1, step, midi.Time.vpqn * 3):
+                    self.assertEqual(
+                        index.overlapping(start, start + length),
+                        self.scan(index, start, start + length))
+            self.assertEqual(index.overlapping(midi.Time(0),
+                                               midi.Time(10 ** 9)),
+                             list(index))
+        self.assertLessEqual(set((
+            (type(None), False), (midi.NoteOff, True),
+            (midi.NoteOff, False), (midi.NoteOn, False))), kinds)
+
+
+class TableTest(unittest.TestCase):
+    """Event tables must round-trip sequences and files."""
+
+    def source(self, running_status=False):
+        sequence = build()
+        sequence.running_status = running_status
+        extras = [midi.Name('Lead'), midi.Text('caf\xe9'),
+                  midi.SetKeySignature(-3, 1),
+                  midi.SysExEvent(b'\x7e\x7f\x09\x01\xf7'),
+                  midi.SysExEvent(b'\x43\x12', status=0xf7)]
+        for event in extras:
+            event.time = midi.Time(2 * midi.Time.vpqn)
+            event.track = 1
+            sequence.append(event)
+        for note in (72, 76, 79):
+            sequence.append(midi.NoteOn(
+                note, 80, time=midi.Time(2 * midi.Time.vpqn), track=2,
+                channel=1))
+        sequence.update()
+        return sequence, bytes(sequence)
+
+    def test_parse(self):
+        for running_status in (False, True):
+            sequence, source = self.source(running_status)
+            table = midi.EventTable.parse(source)
+            parsed = midi.Sequence.parse(source)
+            self.assertEqual(
+                [(table.track[index], table.cumulative[index],
+                  table.value[index], bytes(table.event(index)))
+                 for index in range(len(table))],
+                [(event.track, event.time.cumulative, event.time.value,
+                  bytes(event)) for event in parsed])
+            rebuilt = midi.Sequence.from_table(table)
+            self.assertEqual(state(rebuilt), state(parsed))
+            rebuilt.running_status = running_status
+            self.assertEqual(bytes(rebuilt), source)
+
+    def test_sequence(self):
+        sequence, source = self.source()
+        rebuilt = midi.Sequence.from_table(sequence.to_table())
+        self.assertEqual(state(rebuilt), state(sequence))
+        self.assertEqual(
+            [bytes(event.data) for event in rebuilt
+             if isinstance(event, midi.SysExEvent)],
+            [b'\x7e\x7f\x09\x01\xf7', b'\x43\x12'])
+
+
+class LoadManyTest(unittest.TestCase):
+    """Batches must give each file its own result, failed or not."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.source = bytes(build())
+        self.paths = [os.path.join(directory.name, name)
+                      for name in ('good.mid', 'truncated.mid', 'missing.mid',
+                                   'again.mid')]
+        for path, data in zip(self.paths, (self.source, self.source[:-10],
+                                           None, self.source)):
+            if data is not None:
+                with open(path, 'wb') as file:
+                    file.write(data)
+
+    def assertResults(self, results, table):
+        results = dict(results)
+        self.assertEqual(sorted(results), sorted(self.paths))
+        good, truncated, missing, again = [results[path]
+                                           for path in self.paths]
+        self.assertIsInstance(truncated, midi.MIDIError)
+        self.assertIsInstance(missing, OSError)
+        for result in (good, again):
+            if table:
+                self.assertIsInstance(result, midi.EventTable)
+                result = midi.Sequence.from_table(result)
+            self.assertEqual(state(result),
+                             state(midi.Sequence.parse(self.source)))
+
+    def test_serial(self):
+        for table in (False, True):
+            results = list(midi.load_many(self.paths, table=table))
+            self.assertEqual([path for path, _ in results], self.paths)
+            self.assertResults(results, table)
+
+    def test_pool(self):
+        for table in (False, True):
+            for chunksize in (1, 3):
+                self.assertResults(midi.load_many(
+                    self.paths, workers=2, chunksize=chunksize, table=table),
+                    table)
+
+    def test_chunksize(self):
+        with self.assertRaises(midi.MIDIError):
+            midi.load_many(self.paths, chunksize=0)
+
+
+class ParseStatsTest(unittest.TestCase):
+    """Parse statistics must describe the file that was parsed."""
+
+    def sizes(self, source):
+        sizes = list()
+        offset = 14
+        while offset < len(source):
+            size = int.from_bytes(source[offset + 4:offset + 8], 'big')
+            sizes.append(size)
+            offset += 8 + size
+        return sizes
+
+    def test_parse(self):
+        source = bytes(build())
+        stats = midi.ParseStats()
+        sequence = midi.Sequence.parse(source, stats=stats)
+        self.assertEqual(list(stats.phases),
+                         ['chunks', 'decode', 'sort', 'update'])
+        for seconds in stats.phases.values():
+            self.assertGreaterEqual(seconds, 0)
+        self.assertAlmostEqual(stats.total, sum(stats.phases.values()))
+        self.assertEqual(stats.events, collections.Counter(
+            type(event).__name__ for _, _, event in midi.iter_events(source)))
+        self.assertEqual(stats.events['NoteOn'], 32)
+        self.assertEqual(stats.events['EndTrack'], 2)
+        self.assertEqual(stats.tracks, self.sizes(source))
+        self.assertEqual(stats.tempo_map, 2)
+        self.assertEqual(stats.tempo_map, len(sequence.specification))
+
+    def test_lazy(self):
+        source = bytes(build())
+        stats = midi.ParseStats()
+        midi.Sequence.parse(source, lazy=True, stats=stats)
+        self.assertEqual(list(stats.phases), ['chunks'])
+        self.assertEqual(stats.events, collections.Counter())
+        self.assertEqual(stats.tracks, self.sizes(source))
+        self.assertEqual(stats.tempo_map, 0)
+
+
+class PlayTest(unittest.TestCase):
+    """Playback must follow the tempo map in virtual time."""
+
+    def play(self, sequence, late=0):
+        now = [0.0]
+
+        def clock():
+            return now[0]
+
+        async def sleep(seconds):
+            now[0] += seconds + late
+
+        async def run():
+            return [(now[0], event) async for event in midi.play(
+                sequence, clock=clock, sleep=sleep)]
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(run())
+        finally:
+            loop.close()
+
+    def test_times(self):
+        sequence = build()
+        played = self.play(sequence)
+        self.assertEqual([event for _, event in played], list(sequence))
+        for now, event in played:
+            self.assertAlmostEqual(now, event.time.seconds, delta=0.001)
+
+    def test_late(self):
+        sequence = build()
+        played = self.play(sequence, late=0.25)
+        self.assertEqual([event for _, event in played], list(sequence))
+        for now, event in played:
+            self.assertGreaterEqual(now, event.time.seconds - 0.001)
+            self.assertLessEqual(now, event.time.seconds + 0.25)
+
+
+if __name__ == '__main__':
+    unittest.main()